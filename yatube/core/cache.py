@@ -0,0 +1,252 @@
+"""Кэш в файле SQLite, общий для всех процессов на одной машине.
+
+``LocMemCache`` живёт в памяти процесса: у каждого воркера свой кэш,
+и сброс ленты в одном процессе не виден остальным. Здесь записи лежат
+в одной таблице SQLite в режиме WAL, поэтому читатели не мешают друг
+другу, а внешние сервисы не нужны.
+
+* Целые числа хранятся как INTEGER, и ``incr`` — это один атомарный
+  ``UPDATE``; остальные значения сериализуются через pickle.
+* ``add`` — ``INSERT ... ON CONFLICT``, поэтому блокировки через
+  ``cache.add`` работают и между процессами.
+* Размер ограничен числом записей (``MAX_ENTRIES``) и суммарным объёмом
+  значений (``MAX_SIZE`` в байтах); лишнее вытесняется по давности
+  последнего чтения (LRU). Время чтения обновляется не чаще раза
+  в ``ACCESS_RESOLUTION`` секунд, чтобы чтения не превращались в записи.
+
+Пример настройки::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+            'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 2 ** 20},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Время чтения — только для LRU, ему хватает точности в минуту; чаще
+# каждое чтение горячего ключа превращалось бы в UPDATE под блокировкой
+# записи.
+ACCESS_RESOLUTION = 60
+BUSY_TIMEOUT = 5
+# Проверять размер кэша раз в столько записей (в каждом процессе).
+CULL_EVERY = 100
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed_idx ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires);
+'''
+ALIVE = '(expires IS NULL OR expires > ?)'
+
+
+def _dump(value):
+    # bool — подкласс int, но incr для него не нужен
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value, 8
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return data, len(data)
+
+
+def _load(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get('OPTIONS', {})
+        self._max_size = options.get('MAX_SIZE')
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        """Соединение своё у каждого потока и у каждого процесса
+        (после fork старое соединение использовать нельзя)."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self._path, timeout=BUSY_TIMEOUT, isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, key, value, timeout, only_if_missing=False):
+        now = time.time()
+        data, size = _dump(value)
+        sql = (
+            'INSERT INTO cache (key, value, expires, accessed, size) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed, size = excluded.size'
+        )
+        params = [key, data, self.get_backend_timeout(timeout), now, size]
+        if only_if_missing:
+            sql += ' WHERE NOT (cache.expires IS NULL OR cache.expires > ?)'
+            params.append(now)
+        written = self._connection().execute(sql, params).rowcount > 0
+        if written:
+            self._maybe_cull()
+        return written
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY == 0:
+            self.cull()
+
+    def cull(self):
+        """Удаляет просроченные записи и вытесняет давно не читанные,
+        пока кэш не уложится в ``MAX_ENTRIES`` и ``MAX_SIZE``."""
+        connection = self._connection()
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', [time.time()])
+        connection.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+            'ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            [self._max_entries],
+        )
+        if self._max_size:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM ('
+                'SELECT key, SUM(size) OVER (ORDER BY accessed DESC) '
+                'AS total FROM cache) WHERE total > ?)',
+                [self._max_size],
+            )
+
+    def _touch_accessed(self, keys, now):
+        if keys:
+            placeholders = ', '.join('?' * len(keys))
+            self._connection().execute(
+                f'UPDATE cache SET accessed = ? '
+                f'WHERE key IN ({placeholders})',
+                [now, *keys],
+            )
+
+    def _read(self, keys):
+        now = time.time()
+        found = {}
+        stale = []
+        # SQLite ограничивает число параметров запроса
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self._connection().execute(
+                f'SELECT key, value, accessed FROM cache '
+                f'WHERE key IN ({placeholders}) AND {ALIVE}',
+                [*chunk, now],
+            )
+            for key, value, accessed in rows:
+                found[key] = _load(value)
+                if accessed < now - ACCESS_RESOLUTION:
+                    stale.append(key)
+        self._touch_accessed(stale, now)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._read([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        found = self._read(list(names))
+        return {names[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self._key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key, value in data.items():
+                self.set(key, value, timeout, version)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(
+            self._key(key, version), value, timeout, only_if_missing=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection().execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}',
+            [self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()],
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        row = self._connection().execute(
+            f'UPDATE cache SET value = value + ?, accessed = ? '
+            f"WHERE key = ? AND {ALIVE} AND typeof(value) = 'integer' "
+            f'RETURNING value',
+            [delta, time.time(), key, time.time()],
+        ).fetchone()
+        if row is None:
+            # Ключа нет или там не число — различаем, как LocMemCache
+            if key in self._read([key]):
+                raise TypeError('Значение в кэше не целое число.')
+            raise ValueError("Key '%s' not found" % key)
+        return row[0]
+
+    def has_key(self, key, version=None):
+        row = self._connection().execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {ALIVE}',
+            [self._key(key, version), time.time()],
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        cursor = self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', [self._key(key, version)])
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            self._connection().execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', chunk)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение с файлом кэша держим открытым между запросами
+        pass
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.cache import ACCESS_RESOLUTION, SQLiteCache
+
+
+def make_cache(location, **options):
+    return SQLiteCache(location, {'OPTIONS': options})
+
+
+def increment(location, times):
+    cache = make_cache(location)
+    for _ in range(times):
+        cache.incr('hits')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = make_cache(self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_shared_between_instances(self):
+        self.cache.set('feed', {'posts': [1, 2, 3]})
+        other = make_cache(self.location)
+        self.assertEqual(other.get('feed'), {'posts': [1, 2, 3]})
+        other.delete('feed')
+        self.assertIsNone(self.cache.get('feed'))
+
+    def test_expired_value_missing(self):
+        self.cache.set('key', 'value', timeout=60)
+        with mock.patch('core.cache.time.time', return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new'))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_add_only_missing(self):
+        self.assertTrue(self.cache.add('lock', True))
+        self.assertFalse(self.cache.add('lock', False))
+        self.assertIs(self.cache.get('lock'), True)
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        self.assertEqual(self.cache.decr('counter'), 5)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_atomic_across_processes(self):
+        self.cache.set('hits', 0)
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(increment, [self.location] * 4, [50] * 4))
+        self.assertEqual(self.cache.get('hits'), 200)
+
+    def test_least_recently_used_evicted(self):
+        cache = make_cache(self.location, MAX_ENTRIES=2)
+        now = time.time()
+        for offset, key in enumerate(['a', 'b', 'c']):
+            with mock.patch('core.cache.time.time', return_value=now + offset):
+                cache.set(key, key)
+        with mock.patch('core.cache.time.time',
+                        return_value=now + ACCESS_RESOLUTION + 10):
+            cache.get('a')
+        cache.cull()
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 'a', 'c': 'c'})
+
+    def test_hot_reads_do_not_write(self):
+        now = time.time()
+        self.cache.set('hot', 'value')
+        with mock.patch.object(self.cache, '_touch_accessed') as touch:
+            for offset in (1, 10, 30):
+                with mock.patch('core.cache.time.time',
+                                return_value=now + offset):
+                    self.cache.get('hot')
+        for call in touch.call_args_list:
+            self.assertEqual(call.args[0], [])
+
+    def test_size_bound(self):
+        cache = make_cache(self.location, MAX_SIZE=3000)
+        now = time.time()
+        for offset in range(5):
+            with mock.patch('core.cache.time.time', return_value=now + offset):
+                cache.set(offset, b'x' * 1000)
+        cache.cull()
+        self.assertEqual(sorted(cache.get_many(range(5))), [3, 4])
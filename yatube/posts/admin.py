@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from . import search
 from .models import Post, Group
 
 
@@ -14,6 +16,14 @@ class PostAdmin(admin.ModelAdmin):
     # Добавляем ссылку из пустой ячейки
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу вместо LIKE '%term%'
+        expression = search.match_expression(search_term)
+        if expression is None or not search.is_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        return queryset.filter(pk__in=search.matching_ids(expression)), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
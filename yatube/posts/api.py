@@ -0,0 +1,161 @@
+"""JSON API лент и поста для мобильного клиента.
+
+Ленты отдаются keyset-страницами (``?cursor=``, см. posts.pagination):
+в ответе есть курсоры ``next`` и ``previous``; комментарии поста —
+так же, от старых к новым (``?comments_cursor=``, в ответе
+``comments_next`` и ``comments_previous``). Поля ответа можно
+сузить параметром ``?fields=id,text,author`` — из базы тогда читаются
+только нужные столбцы. Строки читаются через ``values()`` и сразу
+превращаются в словари, объекты моделей не создаются.
+"""
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import timeline
+from .models import Comment, Group, Post, User
+from .pagination import COMMENTS_PER_PAGE, POSTS_PER_PAGE, CursorPaginator
+
+MAX_PER_PAGE = 50
+
+# Поле ответа и столбцы, которые для него нужны.
+POST_FIELDS = {
+    'id': ('id',),
+    'text': ('text',),
+    'pub_date': ('pub_date',),
+    'image': ('image',),
+    'author': ('author__username', 'author__first_name', 'author__last_name'),
+    'group': ('group__slug', 'group__title'),
+    'comments_count': ('comments_count',),
+}
+# Без этих столбцов не построить курсор.
+KEY_COLUMNS = ('id', 'pub_date')
+COMMENT_COLUMNS = ('id', 'text', 'created', 'author__username')
+
+
+def _error(message, status):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def _requested_fields(request):
+    """Поля из ``?fields=``; None, если среди них есть неизвестные."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(POST_FIELDS)
+    fields = [field for field in raw.split(',') if field]
+    if not fields or any(field not in POST_FIELDS for field in fields):
+        return None
+    return fields
+
+
+def _columns(fields):
+    columns = set(KEY_COLUMNS)
+    for field in fields:
+        columns.update(POST_FIELDS[field])
+    return columns
+
+
+def _per_page(request):
+    try:
+        per_page = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        return POSTS_PER_PAGE
+    return min(max(per_page, 1), MAX_PER_PAGE)
+
+
+def _serialize_post(row, fields):
+    data = {}
+    for field in fields:
+        if field == 'author':
+            data['author'] = {
+                'username': row['author__username'],
+                'name': ' '.join(filter(None, (
+                    row['author__first_name'], row['author__last_name']))),
+            }
+        elif field == 'group':
+            data['group'] = row['group__slug'] and {
+                'slug': row['group__slug'],
+                'title': row['group__title'],
+            }
+        elif field == 'image':
+            data['image'] = (
+                default_storage.url(row['image']) if row['image'] else None)
+        else:
+            data[field] = row[field]
+    return data
+
+
+def _feed(request, queryset):
+    fields = _requested_fields(request)
+    if fields is None:
+        return _error(
+            f'Допустимые поля: {", ".join(POST_FIELDS)}.', status=400)
+    page = CursorPaginator(
+        queryset.values(*_columns(fields)), _per_page(request)
+    ).get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [_serialize_post(row, fields) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@require_GET
+def index(request):
+    return _feed(request, Post.objects.all())
+
+
+@require_GET
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return _error('Группа не найдена.', status=404)
+    return _feed(request, Post.objects.filter(group_id=group_id))
+
+
+@require_GET
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return _error('Пользователь не найден.', status=404)
+    return _feed(request, Post.objects.filter(author_id=author_id))
+
+
+@require_GET
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _error('Нужна авторизация.', status=401)
+    timeline.sync_celebrities(request.user.pk)
+    return _feed(request, timeline.timeline_posts(request.user.pk))
+
+
+@require_GET
+def post_detail(request, post_id):
+    fields = _requested_fields(request)
+    if fields is None:
+        return _error(
+            f'Допустимые поля: {", ".join(POST_FIELDS)}.', status=400)
+    row = Post.objects.filter(pk=post_id).values(*_columns(fields)).first()
+    if row is None:
+        return _error('Пост не найден.', status=404)
+    data = _serialize_post(row, fields)
+    comments = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_COLUMNS),
+        COMMENTS_PER_PAGE,
+        date_field='created',
+        ascending=True,
+    ).get_page(request.GET.get('comments_cursor'))
+    data['comments'] = [
+        {
+            'id': comment['id'],
+            'text': comment['text'],
+            'created': comment['created'],
+            'author': comment['author__username'],
+        }
+        for comment in comments
+    ]
+    data['comments_next'] = comments.next_cursor
+    data['comments_previous'] = comments.previous_cursor
+    return JsonResponse(data)
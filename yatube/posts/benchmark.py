@@ -0,0 +1,223 @@
+"""Нагрузочный прогон представлений yatube.
+
+``seed`` заполняет базу заданными объёмами пользователей, групп,
+постов, подписок и комментариев — через массовый импорт
+(posts.bulk_import), так что счётчики, поисковый индекс и ленты
+подписок сразу готовы. ``measure`` гоняет сценарий — одно
+представление — тестовым клиентом в нескольких потоках и меряет время
+и число SQL-запросов каждого ответа. ``report`` сводит замеры в
+словарь для JSON, ``compare`` сравнивает его с сохранённым прогоном.
+"""
+import math
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import bulk_import
+from .models import Comment, Post, User
+
+VOLUMES = {
+    'users': 200,
+    'groups': 20,
+    'posts': 5000,
+    'follows': 2000,
+    'comments': 5000,
+}
+PERCENTILES = (50, 95, 99)
+WORDS = (
+    'кот', 'дом', 'лето', 'река', 'город', 'книга', 'утро', 'дорога',
+    'море', 'лес', 'снег', 'окно', 'песня', 'друг', 'чай', 'поезд',
+)
+
+# Что досталось базе при заполнении: из этого сценарии выбирают адреса.
+Dataset = namedtuple('Dataset', 'usernames user_ids slugs post_ids')
+# ``request(rng, data)`` возвращает метод, адрес и данные формы.
+Scenario = namedtuple('Scenario', 'name auth request')
+Sample = namedtuple('Sample', 'seconds queries status')
+
+
+def _text(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed(rng, volumes=VOLUMES):
+    """Заполняет базу и возвращает ``Dataset``."""
+    usernames = [f'bench{number}' for number in range(volumes['users'])]
+    with transaction.atomic():
+        User.objects.bulk_create(
+            (User(username=name, password=make_password(None))
+             for name in usernames),
+            batch_size=bulk_import.BATCH_SIZE,
+        )
+    slugs = [f'bench-group-{number}' for number in range(volumes['groups'])]
+    now = timezone.now()
+    importer = bulk_import.Importer()
+    kinds = {
+        'groups': (
+            {'slug': slug, 'title': f'Группа {number}',
+             'description': _text(rng)}
+            for number, slug in enumerate(slugs)
+        ),
+        'posts': (
+            {
+                'author': rng.choice(usernames),
+                'text': _text(rng, rng.randint(5, 60)),
+                # Примерно каждый третий пост — без группы
+                'group': rng.choice(slugs + [''] * (len(slugs) // 2)),
+                'pub_date': (now - timedelta(
+                    seconds=rng.randrange(365 * 24 * 60 * 60))).isoformat(),
+            }
+            for _ in range(volumes['posts'])
+        ),
+        'follows': (
+            {'user': rng.choice(usernames), 'author': rng.choice(usernames)}
+            for _ in range(volumes['follows'])
+        ),
+    }
+    for kind, rows in kinds.items():
+        for chunk in bulk_import.chunks(rows):
+            with transaction.atomic():
+                importer.import_chunk(kind, chunk)
+    user_ids = list(User.objects.filter(
+        username__in=usernames).values_list('pk', flat=True))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    with transaction.atomic():
+        Comment.objects.bulk_create(
+            (Comment(post_id=rng.choice(post_ids),
+                     author_id=rng.choice(user_ids), text=_text(rng))
+             for _ in range(volumes['comments'] if post_ids else 0)),
+            batch_size=bulk_import.BATCH_SIZE,
+        )
+        importer.finish()
+    return Dataset(usernames, user_ids, slugs, post_ids)
+
+
+SCENARIOS = [
+    Scenario('index', False, lambda rng, data: (
+        'get', reverse('posts:index'), None)),
+    Scenario('index (auth)', True, lambda rng, data: (
+        'get', reverse('posts:index'), None)),
+    Scenario('group_posts', False, lambda rng, data: (
+        'get', reverse('posts:group_list',
+                       kwargs={'slug': rng.choice(data.slugs)}), None)),
+    Scenario('profile', False, lambda rng, data: (
+        'get', reverse('posts:profile',
+                       kwargs={'username': rng.choice(data.usernames)}),
+        None)),
+    Scenario('post_detail', False, lambda rng, data: (
+        'get', reverse('posts:post_detail',
+                       kwargs={'post_id': rng.choice(data.post_ids)}),
+        None)),
+    Scenario('post_detail (auth)', True, lambda rng, data: (
+        'get', reverse('posts:post_detail',
+                       kwargs={'post_id': rng.choice(data.post_ids)}),
+        None)),
+    Scenario('follow_index', True, lambda rng, data: (
+        'get', reverse('posts:follow_index'), None)),
+    Scenario('post_create', True, lambda rng, data: (
+        'post', reverse('posts:post_create'), {'text': _text(rng)})),
+    Scenario('add_comment', True, lambda rng, data: (
+        'post', reverse('posts:add_comment',
+                        kwargs={'post_id': rng.choice(data.post_ids)}),
+        {'text': _text(rng, 6)})),
+]
+
+
+def _worker(scenario, data, count, seed):
+    rng = random.Random(seed)
+    client = Client()
+    if scenario.auth:
+        client.force_login(User.objects.get(pk=rng.choice(data.user_ids)))
+    samples = []
+    for _ in range(count):
+        method, path, payload = scenario.request(rng, data)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            try:
+                status = getattr(client, method)(path, payload).status_code
+            except DatabaseError:
+                # Тестовый клиент пробрасывает исключения представлений:
+                # «database is locked» при параллельной записи в SQLite
+                # сервер превратил бы в 500. Прочие ошибки — поломка
+                # сценария, их не прячем
+                status = 500
+            seconds = time.perf_counter() - started
+        samples.append(Sample(seconds, len(queries), status))
+    return samples
+
+
+def measure(scenario, data, requests, threads, seed=0):
+    """Прогоняет сценарий ``requests`` раз в ``threads`` потоках.
+
+    Возвращает замеры и общее время. С одним потоком сценарий идёт в
+    текущем, так что видит и незафиксированные данные (нужно тестам).
+    """
+    counts = [requests // threads + (number < requests % threads)
+              for number in range(threads)]
+    started = time.perf_counter()
+    if threads == 1:
+        samples = _worker(scenario, data, requests, seed)
+    else:
+        def run(number):
+            try:
+                return _worker(scenario, data, counts[number], seed + number)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = [sample for part in pool.map(run, range(threads))
+                       for sample in part]
+    return samples, time.perf_counter() - started
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def report(samples, wall_seconds):
+    latencies = [sample.seconds * 1000 for sample in samples]
+    queries = [sample.queries for sample in samples]
+    result = {
+        'requests': len(samples),
+        'errors': sum(sample.status >= 400 for sample in samples),
+        'rps': round(len(samples) / wall_seconds, 1),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent), 2)
+    result['queries_mean'] = round(sum(queries) / len(queries), 1)
+    result['queries_max'] = max(queries)
+    return result
+
+
+def compare(current, baseline, tolerance):
+    """Сценарии, ставшие хуже сохранённого прогона больше чем на
+    ``tolerance`` процентов по p95 или по числу запросов в секунду."""
+    regressions = []
+    limit = 1 + tolerance / 100
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * limit:
+            regressions.append(
+                f'{name}: p95 {before["p95_ms"]} → {result["p95_ms"]} мс')
+        if result['rps'] * limit < before['rps']:
+            regressions.append(
+                f'{name}: {before["rps"]} → {result["rps"]} запросов/с')
+        if result['queries_max'] > before['queries_max']:
+            regressions.append(
+                f'{name}: SQL-запросов {before["queries_max"]} → '
+                f'{result["queries_max"]}')
+    return regressions
@@ -0,0 +1,310 @@
+"""Массовый импорт групп, постов и подписок из JSONL или CSV.
+
+Файл читается построчно и обрабатывается порциями по ``CHUNK_SIZE``
+строк, каждая порция — в своей транзакции, поэтому память не зависит от
+размера файла, а прерванный импорт оставляет в базе целые порции.
+Записи вставляются через ``bulk_create`` пачками по ``BATCH_SIZE``,
+посты — через ``insert_rows``: ``bulk_create`` заменил бы дату поста из
+файла текущей (``auto_now_add``).
+
+Авторы и группы в строках указаны по username и slug; их id ищутся в
+таблицах в памяти, которые дочитываются из базы только для ещё не
+встречавшихся имён — один запрос на порцию.
+
+Массовая вставка не вызывает сигналов, поэтому счётчики, поисковый
+индекс, ленты подписок и кэш после импорта обновляет ``finish``.
+
+Поля строк:
+
+* группы — ``slug``, ``title``, ``description``;
+* посты — ``author``, ``text``, необязательные ``group``, ``pub_date``
+  (ISO 8601) и ``image`` (путь к файлу внутри каталога картинок);
+* подписки — ``user`` и ``author``.
+"""
+import csv
+import json
+import os
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import search, tags, timeline
+from .counters import recount
+from .models import Follow, Group, Post, User
+
+KINDS = ('groups', 'posts', 'follows')
+FORMATS = ('jsonl', 'csv')
+# Строк в одной транзакции.
+CHUNK_SIZE = 10000
+# Строк в одном INSERT: SQLite собирает его из SELECT ... UNION ALL,
+# а в составном SELECT не больше 500 частей.
+BATCH_SIZE = 500
+# Имён в одном запросе ``__in`` при поиске id.
+LOOKUP_SIZE = 500
+
+
+def read_rows(stream, fmt):
+    """Строки файла по одной — словари полей."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            raise ValueError(f'строка {number}: {error}')
+        if not isinstance(row, dict):
+            raise ValueError(f'строка {number}: ожидался объект')
+        yield row
+
+
+def chunks(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(row, field):
+    return str(row.get(field) or '').strip()
+
+
+class Lookup:
+    """Таблица «имя — id», которая дочитывается из базы по мере надобности.
+
+    Для имён, которых в базе нет, хранится None, чтобы не искать их
+    повторно.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = list({name for name in names if name} - self.ids.keys())
+        for start in range(0, len(missing), LOOKUP_SIZE):
+            part = missing[start:start + LOOKUP_SIZE]
+            self.ids.update(dict.fromkeys(part))
+            self.ids.update(self.queryset.filter(
+                **{f'{self.field}__in': part}
+            ).values_list(self.field, 'pk'))
+        return self.ids
+
+    def forget(self, names):
+        for name in names:
+            self.ids.pop(name, None)
+
+
+def insert_rows(model, fields, rows):
+    """Вставляет строки одним executemany, пропуская уже записанные.
+
+    Значения передаются в базу как есть, даты — уже подготовленными
+    ``connection.ops.adapt_datetimefield_value``.
+    """
+    meta = model._meta
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(meta.get_field(field).column)
+                        for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'{connection.ops.insert_statement(ignore_conflicts=True)} '
+        f'{quote(meta.db_table)} ({columns}) VALUES ({placeholders}) '
+        f'{connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+class Importer:
+    """Импорт порциями; ``stats`` считает вставленные и пропущенные
+    строки, ``skipped`` — причины пропуска."""
+
+    def __init__(self, create_users=False, images_dir=None):
+        self.create_users = create_users
+        self.images_dir = images_dir and os.path.realpath(images_dir)
+        self.users = Lookup(User.objects, 'username')
+        self.groups = Lookup(Group.objects, 'slug')
+        self.stats = Counter()
+        self.skipped = Counter()
+        self.tags = set()
+        # Всё, что новее этих id, вставлено импортом
+        self.last_post_pk = Post.objects.aggregate(last=Max('pk'))['last']
+        self.last_follow_pk = Follow.objects.aggregate(
+            last=Max('pk'))['last']
+
+    def skip(self, reason):
+        self.skipped[reason] += 1
+        self.stats['skipped'] += 1
+
+    def import_chunk(self, kind, rows):
+        getattr(self, f'_import_{kind}')(rows)
+
+    def _resolve_users(self, names):
+        ids = self.users.resolve(names)
+        if not self.create_users:
+            return ids
+        new = sorted({name for name in names if name and ids[name] is None})
+        if new:
+            User.objects.bulk_create(
+                (User(username=name, password=make_password(None))
+                 for name in new),
+                batch_size=BATCH_SIZE,
+            )
+            self.stats['users'] += len(new)
+            self.tags.add('authors')
+            self.users.forget(new)
+            ids = self.users.resolve(new)
+        return ids
+
+    def _import_groups(self, rows):
+        ids = self.groups.resolve(_text(row, 'slug') for row in rows)
+        new = []
+        seen = set()
+        for row in rows:
+            slug, title = _text(row, 'slug'), _text(row, 'title')
+            if not slug or not title:
+                self.skip('нет slug или названия группы')
+            elif ids[slug] is not None or slug in seen:
+                # Группа уже есть в базе или раньше в файле
+                self.skip('группа уже есть')
+            else:
+                seen.add(slug)
+                new.append(Group(
+                    slug=slug, title=title,
+                    description=_text(row, 'description'),
+                ))
+        Group.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        self.groups.forget(seen)
+        self.stats['groups'] += len(new)
+        if new:
+            self.tags.add('groups')
+
+    def _pub_date(self, row):
+        value = _text(row, 'pub_date')
+        if not value:
+            return timezone.now()
+        try:
+            date = parse_datetime(value)
+        except ValueError:
+            return None
+        if date is not None and timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        return date
+
+    def _image(self, row):
+        """Копирует картинку поста в хранилище и возвращает её имя."""
+        name = _text(row, 'image')
+        if not name or not self.images_dir:
+            return ''
+        path = os.path.realpath(os.path.join(self.images_dir, name))
+        if (os.path.commonpath([path, self.images_dir]) != self.images_dir
+                or not os.path.isfile(path)):
+            self.skipped['картинка не найдена'] += 1
+            return ''
+        with open(path, 'rb') as image:
+            return default_storage.save(
+                f'posts/{os.path.basename(path)}', File(image))
+
+    def _import_posts(self, rows):
+        authors = self._resolve_users([_text(row, 'author') for row in rows])
+        groups = self.groups.resolve(_text(row, 'group') for row in rows)
+        new = []
+        for row in rows:
+            text = _text(row, 'text')
+            author_id = authors.get(_text(row, 'author'))
+            group = _text(row, 'group')
+            pub_date = self._pub_date(row)
+            if not text:
+                self.skip('пустой текст')
+            elif author_id is None:
+                self.skip('неизвестный автор')
+            elif group and groups.get(group) is None:
+                self.skip('неизвестная группа')
+            elif pub_date is None:
+                self.skip('неверная дата')
+            else:
+                group_id = groups.get(group)
+                new.append((
+                    text, connection.ops.adapt_datetimefield_value(pub_date),
+                    author_id, group_id, self._image(row), 0,
+                ))
+                self.tags.add(f'author-posts:{author_id}')
+                self.tags.add(f'stats:{author_id}')
+                if group_id:
+                    self.tags.add(f'group-posts:{group_id}')
+        insert_rows(Post, (
+            'text', 'pub_date', 'author', 'group', 'image', 'comments_count',
+        ), new)
+        self.stats['posts'] += len(new)
+
+    def _import_follows(self, rows):
+        ids = self._resolve_users(
+            [_text(row, field) for row in rows for field in ('user', 'author')]
+        )
+        new = []
+        for row in rows:
+            user_id = ids.get(_text(row, 'user'))
+            author_id = ids.get(_text(row, 'author'))
+            if user_id is None or author_id is None:
+                self.skip('неизвестный пользователь')
+            elif user_id == author_id:
+                self.skip('подписка на себя')
+            else:
+                new.append(Follow(user_id=user_id, author_id=author_id))
+                self.tags.add(f'stats:{user_id}')
+                self.tags.add(f'stats:{author_id}')
+        # Повторные подписки отбрасывает уникальный индекс, поэтому
+        # вставленные считаем по числу строк в таблице
+        before = Follow.objects.count()
+        Follow.objects.bulk_create(
+            new, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        inserted = Follow.objects.count() - before
+        self.stats['follows'] += inserted
+        if inserted < len(new):
+            self.skipped['подписка уже есть'] += len(new) - inserted
+            self.stats['skipped'] += len(new) - inserted
+
+    def finish(self):
+        """Делает то, что при обычном сохранении делают сигналы."""
+        new_posts = Post.objects.all()
+        if self.last_post_pk is not None:
+            new_posts = new_posts.filter(pk__gt=self.last_post_pk)
+        new_follows = Follow.objects.all()
+        if self.last_follow_pk is not None:
+            new_follows = new_follows.filter(pk__gt=self.last_follow_pk)
+        refresh(new_posts, new_follows)
+        if self.stats['posts'] or self.stats['users'] or self.stats['groups']:
+            self.tags.add('feed')
+        reset = sorted(self.tags)
+        for start in range(0, len(reset), BATCH_SIZE):
+            tags.invalidate_on_commit(*reset[start:start + BATCH_SIZE])
+
+
+def refresh(new_posts, new_follows=None):
+    """Обновляет то, что при обычном сохранении обновляют сигналы:
+    счётчики, поисковый индекс и ленты подписок.
+
+    ``new_follows`` можно не передавать, если подписки вставлены раньше
+    постов и все посты их авторов есть в ``new_posts``.
+    """
+    recount()
+    if search.is_available():
+        # Посты, сохранённые сайтом во время импорта, уже проиндексированы
+        search.index_many(search.unindexed(new_posts).values_list(
+            'pk', 'text').iterator())
+    timeline.fan_out_many(new_posts)
+    if new_follows is not None:
+        timeline.backfill_many(new_follows)
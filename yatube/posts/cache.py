@@ -0,0 +1,168 @@
+import time
+
+from django.core.cache import cache
+
+from . import cards, tags
+from .models import Post
+from .pagination import POSTS_PER_PAGE
+
+INDEX_CACHE_KEY = 'posts:index'
+# Поколение копии главной — это версия тега ``feed``.
+INDEX_GENERATION_KEY = tags.TAG_KEY.format('feed')
+INDEX_LOCK_KEY = 'posts:index:lock'
+# Сколько первых страниц главной держим в кэше готовыми.
+INDEX_CACHED_PAGES = 5
+# Страховочный срок жизни копии на случай изменений в обход сигналов
+# (queryset.update(), правка базы руками); обычно копию сбрасывают сигналы.
+INDEX_REFRESH_SECONDS = 300
+INDEX_LOCK_SECONDS = 30
+
+POST_CACHE_KEY = 'posts:post:{}'
+# Пост с автором и группой; устаревает по тегам (см. posts.tags).
+POST_CACHE_SECONDS = 24 * 60 * 60
+
+# Поля, которые нужны шаблонам ленты.
+FEED_FIELDS = (
+    'id', 'text', 'pub_date', 'image',
+    'author', 'author__username', 'author__first_name', 'author__last_name',
+    'group', 'group__slug', 'group__title',
+)
+
+# Поля страницы поста: кэш общий для всех процессов и лежит на диске,
+# пароль и почта автора туда попадать не должны.
+POST_FIELDS = FEED_FIELDS + ('comments_count',)
+
+
+def feed_queryset():
+    return Post.objects.select_related('author', 'group').only(*FEED_FIELDS)
+
+
+class CachedFeed:
+    """Лента, первые страницы которой уже лежат в памяти.
+
+    Для ``Paginator`` выглядит как список длиной во всю ленту: срезы
+    внутри закэшированных страниц отдаются из памяти, более глубокие
+    страницы читаются из базы.
+    """
+
+    def __init__(self, posts, total):
+        self.posts = posts
+        self.total = total
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and index.stop is not None:
+            if index.stop <= len(self.posts):
+                return self.posts[index]
+        elif isinstance(index, int) and 0 <= index < len(self.posts):
+            return self.posts[index]
+        return feed_queryset()[index]
+
+
+def _index_posts(generation):
+    """Первые страницы главной. У каждого поста — версии тегов его
+    карточки на момент чтения (``_card_versions``, см. posts.cards), чтобы
+    карточка из устаревшей копии не сохранилась как свежая.
+    """
+    posts = list(feed_queryset()[:INDEX_CACHED_PAGES * POSTS_PER_PAGE])
+    current = tags.versions(
+        {tag for post in posts for tag in cards.card_tags(post)} | {'feed'})
+    # Правка поста, автора или группы сбрасывает и ``feed``: раз он не
+    # менялся с начала построения, версии сняты до любых правок после
+    # чтения. Иначе карточки этой копии лучше не кэшировать вовсе
+    fresh = current.pop('feed') == generation
+    for post in posts:
+        post._card_versions = fresh and {
+            tag: current[tag] for tag in cards.card_tags(post)}
+    return posts
+
+
+def _build_index(generation):
+    queryset = feed_queryset()
+    posts = _index_posts(generation)
+    if len(posts) < INDEX_CACHED_PAGES * POSTS_PER_PAGE:
+        total = len(posts)
+    else:
+        total = queryset.count()
+    envelope = {
+        'posts': posts,
+        'total': total,
+        'generation': generation,
+        'expires': time.time() + INDEX_REFRESH_SECONDS,
+    }
+    cache.set(INDEX_CACHE_KEY, envelope, timeout=None)
+    return envelope
+
+
+def get_index_feed():
+    """Лента главной страницы из кэша.
+
+    Пересчитывает копию только один процесс («single flight»): кто
+    взял блокировку, тот и строит ленту, остальные пока отдают
+    устаревшую копию.
+    """
+    entries = cache.get_many([INDEX_CACHE_KEY, INDEX_GENERATION_KEY])
+    envelope = entries.get(INDEX_CACHE_KEY)
+    generation = entries.get(INDEX_GENERATION_KEY)
+    fresh = (
+        envelope is not None
+        and envelope['generation'] == generation
+        and envelope['expires'] > time.time()
+    )
+    if not fresh:
+        if cache.add(INDEX_LOCK_KEY, True, timeout=INDEX_LOCK_SECONDS):
+            try:
+                envelope = _build_index(generation)
+            finally:
+                cache.delete(INDEX_LOCK_KEY)
+        elif envelope is None:
+            # Копии ещё нет совсем: отдавать нечего, строим без записи.
+            tags.add(tag_versions={'feed': generation})
+            return CachedFeed(
+                _index_posts(generation), feed_queryset().count())
+    # Страница из устаревшей копии должна устареть вместе с ней
+    tags.add(tag_versions={'feed': envelope['generation']})
+    return CachedFeed(envelope['posts'], envelope['total'])
+
+
+def invalidate_index():
+    """Помечает копию главной устаревшей, не удаляя её."""
+    tags.invalidate('feed')
+
+
+def _post_tags(post_id, author_id, group_id):
+    post_tags = [
+        f'post:{post_id}', f'comments:{post_id}', f'author:{author_id}',
+    ]
+    if group_id:
+        post_tags.append(f'group:{group_id}')
+    return post_tags
+
+
+def post_tags(post):
+    return _post_tags(post.pk, post.author_id, post.group_id)
+
+
+def get_post(post_id):
+    """Пост вместе с автором и группой из кэша; None, если поста нет."""
+    key = POST_CACHE_KEY.format(post_id)
+    found = tags.fetch([key])
+    if key in found:
+        return found[key]
+    ids = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id').first()
+    if ids is None:
+        return None
+    # Версии всех тегов снимаем до чтения поста: правка автора или группы
+    # во время сборки оставит копию устаревшей, а не выдаст её за свежую.
+    snapshot = tags.versions(_post_tags(post_id, *ids))
+    post = Post.objects.select_related('author', 'group').only(
+        *POST_FIELDS).filter(pk=post_id).first()
+    if post is not None:
+        tags.store(key, post, snapshot, POST_CACHE_SECONDS)
+    return post
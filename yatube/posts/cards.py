@@ -0,0 +1,68 @@
+"""Карточки постов в лентах, закэшированные по отдельности.
+
+Все ленты показывают пост одной и той же карточкой
+(``includes/post_card.html``). Готовая разметка карточки лежит в кэше
+с тегами поста, его автора и группы (см. posts.tags): правка поста,
+замена картинки, готовая миниатюра, переименование автора или группы
+делают карточку устаревшей. Комментариев в карточке нет, поэтому они
+её не сбрасывают.
+
+``prefetch`` достаёт карточки всей страницы разом, так что отрисовка
+страницы ленты — это в основном чтение из кэша; миниатюры нужны только
+постам, чьих карточек в кэше нет.
+"""
+from django.template.loader import render_to_string
+from django.utils import translation
+
+from . import tags
+
+CARD_SECONDS = 24 * 60 * 60
+CARD_KEY = 'posts:card:{}:{}'
+
+
+def card_tags(post):
+    card_tags = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id:
+        card_tags.append(f'group:{post.group_id}')
+    return card_tags
+
+
+def _card_key(post):
+    return CARD_KEY.format(post.pk, translation.get_language() or '')
+
+
+def prefetch(posts):
+    """Загружает готовые карточки страницы.
+
+    Возвращает посты, карточки которых придётся отрисовать.
+    """
+    posts = list(posts)
+    if not posts:
+        return []
+    found = tags.fetch([_card_key(post) for post in posts])
+    for post in posts:
+        post._card_html = found.get(_card_key(post))
+    return [post for post in posts if post._card_html is None]
+
+
+def render_card(post):
+    """Карточка поста из кэша или отрисованная и сохранённая.
+
+    Если пост пришёл с версиями тегов, снятыми при чтении из базы
+    (``_card_versions``, так делает копия главной в posts.cache),
+    карточка сохраняется с ними: отрисованная из устаревшей копии, она
+    сразу окажется устаревшей. ``_card_versions = False`` — не
+    сохранять совсем.
+    """
+    if not hasattr(post, '_card_html'):
+        prefetch([post])
+    if post._card_html is None:
+        post._card_html = render_to_string(
+            'includes/post_card.html', {'post': post})
+        card_versions = getattr(post, '_card_versions', None)
+        if card_versions is not False:
+            tags.store(
+                _card_key(post), post._card_html,
+                card_versions or card_tags(post), CARD_SECONDS,
+            )
+    return post._card_html
@@ -0,0 +1,116 @@
+"""Условные GET-запросы (ETag / Last-Modified) для лент, RSS и поста.
+
+Валидаторы страницы считаются без отрисовки шаблона: по версиям тегов
+(см. posts.tags), от которых зависит страница. На это уходит чтение
+версий из кэша и не больше одного индексного запроса — найти id группы
+или автора по адресу. Если браузер или CDN присылает совпадающие
+``If-None-Match`` / ``If-Modified-Since``, ответ — 304 без тела.
+
+Запрос за id идёт с тем же сроком, что и отрисовка страницы
+(posts.page_cache); если база не отвечает, валидаторов у ответа нет, а
+гость получает устаревшую копию страницы от ``cache_anonymous_page``.
+
+ETag учитывает пользователя: авторизованным страницы показываются
+по-разному. ``Last-Modified`` отдаётся только гостям — у него нет
+места для пользователя.
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from django.db import DatabaseError
+from django.views.decorators.http import condition
+
+from . import page_cache, tags
+from .cache import get_post
+from .models import Group, User
+
+
+def index_tags(request):
+    return ['feed']
+
+
+def group_tags(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return None
+    return [f'group:{group_id}', f'group-posts:{group_id}', 'authors']
+
+
+def _author_id(username):
+    return User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+
+
+def profile_tags(request, username):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return [
+        f'author:{author_id}', f'author-posts:{author_id}',
+        f'stats:{author_id}', 'groups',
+    ]
+
+
+def author_feed_tags(request, username):
+    # В RSS автора нет счётчиков, только посты
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return [f'author:{author_id}', f'author-posts:{author_id}', 'groups']
+
+
+def post_tags(request, post_id):
+    post = get_post(post_id)
+    if post is None:
+        return None
+    page_tags = [
+        f'post:{post.pk}', f'comments:{post.pk}',
+        f'author:{post.author_id}', f'stats:{post.author_id}',
+        # имена комментаторов
+        'authors',
+    ]
+    if post.group_id:
+        page_tags.append(f'group:{post.group_id}')
+    return page_tags
+
+
+def conditional_page(page_tags):
+    """Декоратор представления: ETag и Last-Modified по тегам страницы.
+
+    ``page_tags(request, **kwargs)`` — теги страницы или None, если
+    валидаторов нет (например, страницы не существует).
+    """
+    def page_versions(request, **kwargs):
+        if not hasattr(request, '_page_versions'):
+            try:
+                with page_cache.db_deadline(page_cache.DB_DEADLINE_SECONDS):
+                    found = page_tags(request, **kwargs)
+            except DatabaseError:
+                found = None
+            request._page_versions = (
+                None if found is None else tags.versions(found))
+        return request._page_versions
+
+    def etag(request, *args, **kwargs):
+        versions = page_versions(request, **kwargs)
+        if versions is None:
+            return None
+        user = request.user.pk if request.user.is_authenticated else ''
+        raw = '|'.join([str(user)] + [
+            f'{tag}={versions[tag]}' for tag in sorted(versions)
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        versions = page_versions(request, **kwargs)
+        # Тег без версии ни разу не сбрасывали — он не меняет дату
+        changes = [version for version in (versions or {}).values()
+                   if version is not None]
+        if not changes:
+            return None
+        return datetime.fromtimestamp(max(changes) / 10 ** 9, tz=timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
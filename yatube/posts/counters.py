@@ -0,0 +1,109 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарным ``UPDATE ... SET n = n + 1`` из сигналов, то
+есть в той же транзакции, что и сама запись. Если строки счётчиков ещё
+нет, она создаётся пересчётом. Починить разошедшиеся счётчики можно
+командой ``manage.py recount_counters``.
+
+Для страницы поста счётчики автора читаются из кэша (``cached_stats``)
+с тегом ``stats:<id>``, который сбрасывает ``bump`` (и ещё раз после
+фиксации транзакции, см. ``tags.invalidate_on_commit``); после пересчёта
+копии доживают свои ``STATS_CACHE_SECONDS``.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import tags
+from .models import Comment, Follow, Post, User, UserStats
+
+STATS_CACHE_KEY = 'posts:stats:{}'
+STATS_CACHE_SECONDS = 5 * 60
+
+
+def _count_subquery(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def create_stats(user_id):
+    """Создаёт счётчики пользователя, посчитав их по базе."""
+    stats, _ = UserStats.objects.get_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id).count(),
+        },
+    )
+    return stats
+
+
+def get_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return create_stats(user.pk)
+
+
+def cached_stats(user_id):
+    def build():
+        stats = UserStats.objects.filter(user_id=user_id).first()
+        return stats or create_stats(user_id)
+
+    return tags.get_or_set(
+        STATS_CACHE_KEY.format(user_id), [f'stats:{user_id}'], build,
+        STATS_CACHE_SECONDS,
+    )
+
+
+def bump(user_id, **deltas):
+    """Меняет счётчики пользователя на ``deltas``: bump(1, posts_count=1)."""
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    # Уменьшать отсутствующий счётчик незачем: так бывает, когда строку
+    # уже удалило каскадом вместе с пользователем.
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        create_stats(user_id)
+    tags.invalidate_on_commit(f'stats:{user_id}')
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def recount():
+    """Пересчитывает все счётчики несколькими UPDATE по всей таблице.
+
+    Возвращает число строк счётчиков пользователей и постов.
+    """
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id)
+            for user_id in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True).iterator()
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    # У UserStats первичный ключ — это user_id, поэтому OuterRef('pk')
+    # подходит и для счётчиков пользователя, и для постов.
+    stats_updated = UserStats.objects.update(
+        posts_count=_count_subquery(Post.objects, 'author'),
+        followers_count=_count_subquery(Follow.objects, 'author'),
+        following_count=_count_subquery(Follow.objects, 'user'),
+    )
+    posts_updated = Post.objects.update(
+        comments_count=_count_subquery(Comment.objects, 'post')
+    )
+    return stats_updated, posts_updated
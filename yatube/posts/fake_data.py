@@ -0,0 +1,290 @@
+"""Генератор больших правдоподобных наборов данных.
+
+Пользователи, группы, подписки, посты и комментарии создаются порциями
+по ``CHUNK_SIZE`` строк, каждая порция — в своей транзакции. Порция
+зависит только от зерна и своего номера (у неё свои ``random.Random``
+и ``Faker``), а id строк задаются явно, от запомненного начала.
+Поэтому один и тот же ``seed`` даёт один и тот же набор, а прерванную
+генерацию можно продолжить с первой незаписанной порции: состояние
+(``GenerationState``) сохраняется в JSON-файл после каждой порции, а
+повторная вставка уже записанной порции ничего не меняет — строки с
+теми же ключами пропускаются.
+
+Распределения похожи на настоящие: число подписчиков, активность
+авторов, популярность групп и комментируемость постов подчиняются
+закону Ципфа, даты постов растут вместе с id, комментарии появляются
+после поста.
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from .bulk_import import insert_rows
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 10000
+LOCALE = 'ru_RU'
+# Порядок важен: подписки вставляются до постов, и ленты подписок
+# заполняются одним проходом по новым постам.
+KINDS = ('users', 'groups', 'follows', 'posts', 'comments')
+VOLUMES = {
+    'users': 10000,
+    'groups': 50,
+    'follows': 200000,
+    'posts': 100000,
+    'comments': 300000,
+}
+# Показатели закона Ципфа: чем больше, тем сильнее перекос к «звёздам».
+FOLLOW_SKEW = 1.1
+AUTHOR_SKEW = 1.0
+GROUP_SKEW = 1.2
+COMMENT_SKEW = 0.9
+# Доля постов без группы.
+NO_GROUP_SHARE = 0.3
+IMAGE_SIZE = (960, 540)
+IMAGE_DIR = 'posts'
+
+
+class GenerationState:
+    """Параметры генерации и сколько порций каждого вида уже записано."""
+
+    def __init__(self, path, seed, volumes, days, images, image_share):
+        self.path = path
+        self.params = {
+            'seed': seed, 'volumes': volumes, 'days': days,
+            'images': images, 'image_share': image_share,
+        }
+        self.base = None
+        self.started = None
+        self.done = dict.fromkeys(KINDS, 0)
+        self.refreshed = False
+
+    def load(self):
+        """Продолжает прерванную генерацию.
+
+        Возвращает False, если файла нет; ValueError — если он от
+        генерации с другими параметрами.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding='utf-8') as source:
+            saved = json.load(source)
+        if saved['params'] != self.params:
+            raise ValueError(
+                f'{self.path} остался от генерации с другими параметрами')
+        self.base = saved['base']
+        self.started = saved['started']
+        self.done = saved['done']
+        self.refreshed = saved['refreshed']
+        return True
+
+    def start(self):
+        """Запоминает, с каких id начнутся новые строки."""
+        self.base = {}
+        for kind, model in (('users', User), ('groups', Group),
+                            ('posts', Post), ('comments', Comment)):
+            last = model.objects.aggregate(last=Max('pk'))['last']
+            self.base[kind] = (last or 0) + 1
+        self.started = timezone.now().isoformat()
+        self.save()
+
+    def save(self):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as target:
+            json.dump({
+                'params': self.params,
+                'base': self.base,
+                'started': self.started,
+                'done': self.done,
+                'refreshed': self.refreshed,
+            }, target, indent=2)
+        os.replace(temporary, self.path)
+
+
+@lru_cache(maxsize=None)
+def _zipf(count, skew):
+    """Накопленные веса для ``random.choices``: ранг 0 самый частый."""
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(count)))
+
+
+class Generator:
+    """Порции строк по ``GenerationState``."""
+
+    def __init__(self, state, password=None):
+        self.state = state
+        self.params = state.params
+        self.volumes = self.params['volumes']
+        self.password = make_password(password)
+        self.end = datetime.fromisoformat(state.started)
+        self.span = timedelta(days=self.params['days'])
+
+    def _random(self, kind, number):
+        key = f'{self.params["seed"]}:{kind}:{number}'
+        fake = Faker(LOCALE)
+        fake.seed_instance(key)
+        return random.Random(key), fake
+
+    def _datetime(self, value):
+        return connection.ops.adapt_datetimefield_value(value)
+
+    def _user_id(self, rng, skew):
+        # Ранг по Ципфу — это и номер пользователя: самые читаемые авторы
+        # пишут больше всех
+        count = self.volumes['users']
+        return self.state.base['users'] + rng.choices(
+            range(count), cum_weights=_zipf(count, skew))[0]
+
+    def post_date(self, number):
+        """Дата поста растёт с номером, как у настоящей ленты."""
+        return self.end - self.span * (
+            1 - (number + 1) / self.volumes['posts'])
+
+    def image_names(self):
+        return [f'{IMAGE_DIR}/fake-{self.params["seed"]}-{number}.jpg'
+                for number in range(self.params['images'])]
+
+    def make_images(self):
+        """Рисует картинки, которые посты делят между собой."""
+        for number, name in enumerate(self.image_names()):
+            path = os.path.join(settings.MEDIA_ROOT, name)
+            if os.path.exists(path):
+                continue
+            rng, _ = self._random('images', number)
+            image = Image.new('RGB', IMAGE_SIZE, tuple(
+                rng.randrange(256) for _ in range(3)))
+            draw = ImageDraw.Draw(image)
+            for _ in range(12):
+                x, y = rng.randrange(IMAGE_SIZE[0]), rng.randrange(
+                    IMAGE_SIZE[1])
+                size = rng.randint(40, 300)
+                draw.ellipse(
+                    (x, y, x + size, y + size),
+                    fill=tuple(rng.randrange(256) for _ in range(3)),
+                )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, 'JPEG', quality=85)
+
+    def users(self, number, start, stop):
+        _, fake = self._random('users', number)
+        base = self.state.base['users']
+        joined = self._datetime(self.end - self.span)
+        insert_rows(User, (
+            'id', 'username', 'first_name', 'last_name', 'email',
+            'password', 'is_superuser', 'is_staff', 'is_active',
+            'date_joined',
+        ), [
+            # Дефис отделяет номер: у Faker в именах дефисов нет
+            (base + index,
+             f'{fake.user_name().replace("-", "")[:140]}-{index}',
+             fake.first_name(), fake.last_name(), '', self.password,
+             False, False, True, joined)
+            for index in range(start, stop)
+        ])
+
+    def groups(self, number, start, stop):
+        _, fake = self._random('groups', number)
+        base = self.state.base['groups']
+        insert_rows(Group, ('id', 'title', 'slug', 'description'), [
+            (base + index, fake.catch_phrase()[:200],
+             f'group-{base + index}', fake.paragraph(nb_sentences=3))
+            for index in range(start, stop)
+        ])
+
+    def follows(self, number, start, stop):
+        rng, _ = self._random('follows', number)
+        base = self.state.base['users']
+        pairs = set()
+        for _ in range(start, stop):
+            user_id = base + rng.randrange(self.volumes['users'])
+            author_id = self._user_id(rng, FOLLOW_SKEW)
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        # Повторы отбрасывает уникальный индекс (user, author)
+        insert_rows(Follow, ('user', 'author'), sorted(pairs))
+
+    def posts(self, number, start, stop):
+        rng, fake = self._random('posts', number)
+        groups = self.volumes['groups']
+        images = self.image_names()
+        base = self.state.base['posts']
+        rows = []
+        for index in range(start, stop):
+            group_id = None
+            if groups and rng.random() >= NO_GROUP_SHARE:
+                group_id = self.state.base['groups'] + rng.choices(
+                    range(groups), cum_weights=_zipf(groups, GROUP_SKEW))[0]
+            image = ''
+            if images and rng.random() < self.params['image_share']:
+                image = rng.choice(images)
+            rows.append((
+                base + index,
+                fake.paragraph(nb_sentences=rng.randint(1, 8)),
+                self._datetime(self.post_date(index)),
+                self._user_id(rng, AUTHOR_SKEW),
+                group_id,
+                image,
+                0,
+            ))
+        insert_rows(Post, (
+            'id', 'text', 'pub_date', 'author', 'group', 'image',
+            'comments_count',
+        ), rows)
+
+    def comments(self, number, start, stop):
+        rng, fake = self._random('comments', number)
+        posts = self.volumes['posts']
+        rows = []
+        for index in range(start, stop):
+            # Больше всего комментируют свежие посты
+            post = posts - 1 - rng.choices(
+                range(posts), cum_weights=_zipf(posts, COMMENT_SKEW))[0]
+            created = min(
+                self.post_date(post)
+                + timedelta(minutes=rng.expovariate(1 / 180)),
+                self.end,
+            )
+            rows.append((
+                self.state.base['comments'] + index,
+                self.state.base['posts'] + post,
+                self._user_id(rng, FOLLOW_SKEW),
+                fake.sentence(nb_words=rng.randint(3, 25)),
+                self._datetime(created),
+            ))
+        insert_rows(Comment, ('id', 'post', 'author', 'text', 'created'), rows)
+
+    def chunks(self, kind):
+        """Номера и границы порций вида ``kind``, которые ещё не записаны."""
+        total = self.volumes[kind]
+        if kind == 'comments' and not self.volumes['posts']:
+            total = 0
+        if kind in ('follows', 'posts', 'comments') \
+                and not self.volumes['users']:
+            total = 0
+        chunks = (total + CHUNK_SIZE - 1) // CHUNK_SIZE
+        for number in range(self.state.done[kind], chunks):
+            start = number * CHUNK_SIZE
+            yield number, start, min(start + CHUNK_SIZE, total)
+
+    def new_posts(self):
+        return Post.objects.filter(pk__gte=self.state.base['posts'])
+
+
+def reset_sequences():
+    """Сдвигает счётчики id после вставки с явными id (нужно не SQLite)."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [User, Group, Post, Comment, Follow])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
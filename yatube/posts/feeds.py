@@ -0,0 +1,122 @@
+"""RSS и Atom для главной, групп и авторов.
+
+Ленты строятся тем же запросом, что и страницы (``feed_queryset``), —
+последние ``FEED_ITEMS`` постов по индексу на дату. Готовый XML
+кэшируется для гостей как обычная страница (posts.page_cache) и
+устаревает по тегам потока, а ETag и Last-Modified по тем же тегам
+(posts.conditional) позволяют читалкам, которые опрашивают ленту каждые
+несколько минут, получать 304 без тела.
+"""
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from . import tags
+from .cache import feed_queryset
+from .conditional import (
+    author_feed_tags, conditional_page, group_tags, index_tags,
+)
+from .models import Group, User
+from .page_cache import cache_anonymous_page
+
+FEED_ITEMS = 20
+TITLE_LENGTH = 50
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние посты'
+    description = 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        tags.add('feed')
+        return feed_queryset()[:FEED_ITEMS]
+
+    def item_title(self, post):
+        return post.text[:TITLE_LENGTH]
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group_id else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        tags.add(f'group:{group.pk}', f'group-posts:{group.pk}', 'authors')
+        return feed_queryset().filter(group=group)[:FEED_ITEMS]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: посты {author.username}'
+
+    def description(self, author):
+        return f'Новые посты пользователя {author.username}'
+
+    def link(self, author):
+        return reverse(
+            'posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        tags.add(f'author:{author.pk}', f'author-posts:{author.pk}', 'groups')
+        return feed_queryset().filter(author=author)[:FEED_ITEMS]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+def _cached(feed, page_tags):
+    return conditional_page(page_tags)(cache_anonymous_page(feed))
+
+
+index_rss = _cached(LatestPostsFeed(), index_tags)
+index_atom = _cached(LatestPostsAtomFeed(), index_tags)
+group_rss = _cached(GroupPostsFeed(), group_tags)
+group_atom = _cached(GroupPostsAtomFeed(), group_tags)
+author_rss = _cached(AuthorPostsFeed(), author_feed_tags)
+author_atom = _cached(AuthorPostsAtomFeed(), author_feed_tags)
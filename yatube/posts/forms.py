@@ -1,5 +1,7 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
+from .images import normalize_image
 from .models import Post, Comment
 
 
@@ -8,6 +10,13 @@ class PostForm(ModelForm):
         model = Post
         fields = ['text', 'group', 'image']
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # Новую загрузку пережимаем, уже сохранённую картинку не трогаем
+        if isinstance(image, UploadedFile):
+            return normalize_image(image)
+        return image
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,96 @@
+"""Нормализация картинок постов при загрузке.
+
+Оригинал с камеры может весить десятки мегабайт, а миниатюры потом
+много раз читают его с диска. Поэтому при загрузке картинка:
+
+* проверяется на размер в пикселях (защита от «декомпрессионных бомб»);
+* для JPEG декодируется сразу в уменьшенном масштабе (draft mode),
+  чтобы не держать в памяти полноразмерный снимок;
+* поворачивается по EXIF-ориентации, после чего метаданные
+  отбрасываются;
+* уменьшается до рабочего размера ``MAX_SIDE`` и сохраняется в WebP,
+  а если Pillow собран без WebP — в JPEG (PNG для картинок
+  с прозрачностью).
+
+Анимированные картинки сохраняются как есть, только с проверкой размера.
+"""
+import os
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, features
+
+MAX_PIXELS = 40_000_000
+MAX_SIDE = 2560
+QUALITY = 85
+BROKEN_IMAGE = 'Картинка повреждена, загрузите другой файл.'
+
+
+def _output_format(has_alpha):
+    if features.check('webp'):
+        return 'WEBP', 'webp', 'image/webp'
+    if has_alpha:
+        return 'PNG', 'png', 'image/png'
+    return 'JPEG', 'jpg', 'image/jpeg'
+
+
+def _decode(image):
+    """Уменьшенная, повёрнутая по EXIF картинка и есть ли в ней
+    прозрачность.
+
+    Заголовок файла ``Image.open`` уже прочитал, а обрезанные или
+    испорченные данные обнаруживаются только здесь, при декодировании.
+    """
+    try:
+        if image.format == 'JPEG':
+            image.draft('RGB', (MAX_SIDE, MAX_SIDE))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (
+            image.mode == 'P' and 'transparency' in image.info
+        )
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        image.thumbnail((MAX_SIDE, MAX_SIDE), Image.LANCZOS)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise ValidationError(BROKEN_IMAGE)
+    return image, has_alpha
+
+
+def normalize_image(uploaded):
+    """Возвращает уменьшенную копию загруженной картинки без метаданных.
+
+    Файл читается потоком из ``uploaded``; при слишком большом
+    разрешении или испорченном файле поднимается ``ValidationError``.
+    """
+    uploaded.seek(0)
+    try:
+        image = Image.open(uploaded)
+    except Image.DecompressionBombError:
+        raise ValidationError('Картинка слишком большая.')
+    except (OSError, ValueError):
+        raise ValidationError(BROKEN_IMAGE)
+    width, height = image.size
+    if width * height > MAX_PIXELS:
+        raise ValidationError(
+            f'Картинка слишком большая: {width}×{height} пикселей.'
+        )
+    if getattr(image, 'is_animated', False):
+        uploaded.seek(0)
+        return uploaded
+
+    image, has_alpha = _decode(image)
+
+    image_format, extension, content_type = _output_format(has_alpha)
+    if image_format == 'JPEG':
+        options = {'quality': QUALITY, 'optimize': True, 'progressive': True}
+    elif image_format == 'WEBP':
+        options = {'quality': QUALITY, 'method': 4}
+    else:
+        options = {'optimize': True}
+    buffer = BytesIO()
+    # exif не передаём — так метаданные не попадают в файл
+    image.save(buffer, image_format, **options)
+    name = os.path.splitext(os.path.basename(uploaded.name))[0]
+    return SimpleUploadedFile(
+        f'{name}.{extension}', buffer.getvalue(), content_type=content_type
+    )
@@ -0,0 +1,89 @@
+"""Хранилище ключей sorl-thumbnail с LRU-кэшем внутри процесса.
+
+Стандартное хранилище ``cached_db`` на каждый тег миниатюры ходит в кэш,
+а при промахе — в базу. Здесь перед ним стоит ограниченный LRU-словарь
+в памяти процесса, а ``prefetch`` загружает записи всех миниатюр
+страницы одним ``get_many`` к кэшу и одним запросом к базе.
+
+Общим хранилищем для всех процессов остаются кэш и таблица
+``thumbnail_kvstore``. Записи о том, что миниатюры нет, живут в памяти
+недолго: её может построить другой процесс.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+LOCAL_MAX_ENTRIES = 10000
+LOCAL_TIMEOUT = 300
+MISSING_TIMEOUT = 10
+
+
+class KVStore(CachedDBStore):
+    def __init__(self):
+        super().__init__()
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, value):
+        timeout = MISSING_TIMEOUT if value is EMPTY_VALUE else LOCAL_TIMEOUT
+        with self._lock:
+            self._local[key] = (value, time.monotonic() + timeout)
+            self._local.move_to_end(key)
+            while len(self._local) > LOCAL_MAX_ENTRIES:
+                self._local.popitem(last=False)
+
+    def _recall(self, key):
+        """Значение из памяти процесса; ``None``, если его там нет."""
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry[0]
+
+    def _get_raw(self, key):
+        value = self._recall(key)
+        if value is None:
+            value = super()._get_raw(key)
+            self._remember(key, EMPTY_VALUE if value is None else value)
+        if value is EMPTY_VALUE:
+            return None
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def prefetch(self, keys):
+        """Загружает в память процесса записи ``keys`` (с префиксами)."""
+        missing = [key for key in keys if self._recall(key) is None]
+        if not missing:
+            return
+        found = self.cache.get_many(missing)
+        for key, value in found.items():
+            self._remember(key, value)
+        missing = [key for key in missing if key not in found]
+        if not missing:
+            return
+        rows = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        values = {key: rows.get(key, EMPTY_VALUE) for key in missing}
+        self.cache.set_many(values, settings.THUMBNAIL_CACHE_TIMEOUT)
+        for key, value in values.items():
+            self._remember(key, value)
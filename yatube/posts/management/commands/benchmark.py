@@ -0,0 +1,129 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет отдельную временную базу и меряет пропускную '
+        'способность, задержки и число SQL-запросов представлений.'
+    )
+
+    def add_arguments(self, parser):
+        for kind, default in benchmark.VOLUMES.items():
+            parser.add_argument(
+                f'--{kind}', type=int, default=default,
+                help=f'Сколько создать: {kind} (по умолчанию {default}).',
+            )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на сценарий.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Параллельных потоков-клиентов.',
+        )
+        parser.add_argument(
+            '--views', nargs='+', default=None,
+            choices=[scenario.name for scenario in benchmark.SCENARIOS],
+            help='Какие сценарии гонять (по умолчанию — все).',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', default=None,
+            help='Куда записать JSON с результатами (иначе — в stdout).',
+        )
+        parser.add_argument(
+            '--baseline', default=None,
+            help='JSON прошлого прогона для сравнения.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=10,
+            help='Допустимое ухудшение относительно --baseline, %%.',
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один поток и один запрос')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as source:
+                baseline = json.load(source)['views']
+        volumes = {kind: options[kind] for kind in benchmark.VOLUMES}
+        workdir = tempfile.mkdtemp(prefix='yatube-benchmark-')
+        # Отдельные файлы базы и кэша: рабочие данные не трогаем, а
+        # потоки видят одну и ту же базу
+        settings_dict = connection.settings_dict
+        old_test = settings_dict.get('TEST', {})
+        settings_dict['TEST'] = {
+            **old_test,
+            'NAME': os.path.join(workdir, 'db.sqlite3'),
+        }
+        old_name = settings_dict['NAME']
+        # Ограничения кэша те же, что у сайта, иначе замеры не про него
+        caches = {'default': {
+            **settings.CACHES['default'],
+            'LOCATION': os.path.join(workdir, 'cache.sqlite3'),
+        }}
+        try:
+            with override_settings(
+                CACHES=caches, DEBUG=False, ALLOWED_HOSTS=['testserver'],
+                MEDIA_ROOT=os.path.join(workdir, 'media'),
+            ):
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    result = self.run(options, volumes)
+                finally:
+                    connection.creation.destroy_test_db(
+                        old_name, verbosity=0)
+        finally:
+            settings_dict['TEST'] = old_test
+            shutil.rmtree(workdir, ignore_errors=True)
+        text = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                target.write(text + '\n')
+        else:
+            self.stdout.write(text)
+        if baseline is not None:
+            regressions = benchmark.compare(
+                result['views'], baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Хуже базового прогона:\n' + '\n'.join(regressions))
+            self.stderr.write(self.style.SUCCESS(
+                'Не хуже базового прогона'))
+
+    def run(self, options, volumes):
+        rng = random.Random(options['seed'])
+        self.stderr.write(f'Заполнение базы: {volumes}')
+        data = benchmark.seed(rng, volumes)
+        views = {}
+        for scenario in benchmark.SCENARIOS:
+            if options['views'] and scenario.name not in options['views']:
+                continue
+            samples, seconds = benchmark.measure(
+                scenario, data, options['requests'], options['threads'],
+                options['seed'],
+            )
+            views[scenario.name] = benchmark.report(samples, seconds)
+            self.stderr.write(
+                f'{scenario.name}: {views[scenario.name]["rps"]} запросов/с, '
+                f'p95 {views[scenario.name]["p95_ms"]} мс'
+            )
+        return {
+            'volumes': volumes,
+            'requests': options['requests'],
+            'threads': options['threads'],
+            'views': views,
+        }
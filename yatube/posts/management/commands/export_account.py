@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии и картинки пользователя в ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--output', default=None,
+            help='Куда записать архив (по умолчанию — имя по пользователю, '
+                 '«-» — stdout).',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден')
+        output = options['output'] or export.filename(user)
+        if output == '-':
+            target = sys.stdout.buffer
+        else:
+            target = open(output, 'wb')
+        try:
+            size = 0
+            for chunk in export.stream(user):
+                target.write(chunk)
+                size += len(chunk)
+        finally:
+            if target is not sys.stdout.buffer:
+                target.close()
+        if output != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f'Архив {output}: {size} байт'
+            ))
@@ -0,0 +1,95 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import bulk_import, fake_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует большой правдоподобный набор пользователей, групп, '
+        'подписок, постов и комментариев; прерванную генерацию '
+        'продолжает с места остановки.'
+    )
+
+    def add_arguments(self, parser):
+        for kind in fake_data.KINDS:
+            default = fake_data.VOLUMES[kind]
+            parser.add_argument(
+                f'--{kind}', type=int, default=default,
+                help=f'Сколько создать: {kind} (по умолчанию {default}).',
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить посты.',
+        )
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Сколько картинок нарисовать для постов.',
+        )
+        parser.add_argument(
+            '--image-share', type=float, default=0.3,
+            help='Доля постов с картинкой (если --images больше нуля).',
+        )
+        parser.add_argument(
+            '--password', default=None,
+            help='Общий пароль пользователей (по умолчанию войти нельзя).',
+        )
+        parser.add_argument(
+            '--state', default='generate_data.json',
+            help='Файл с прогрессом генерации.',
+        )
+
+    def handle(self, *args, **options):
+        volumes = {kind: options[kind] for kind in fake_data.KINDS}
+        if any(volume < 0 for volume in volumes.values()):
+            raise CommandError('Объёмы не могут быть отрицательными')
+        state = fake_data.GenerationState(
+            options['state'], options['seed'], volumes, options['days'],
+            options['images'], options['image_share'],
+        )
+        try:
+            resumed = state.load()
+        except ValueError as error:
+            raise CommandError(
+                f'{error}; удалите его или укажите другой --state')
+        if resumed:
+            self.stdout.write(f'Продолжаем генерацию: {state.done}')
+        else:
+            state.start()
+        generator = fake_data.Generator(state, options['password'])
+        generator.make_images()
+        for kind in fake_data.KINDS:
+            started = time.monotonic()
+            rows = 0
+            for number, start, stop in generator.chunks(kind):
+                with transaction.atomic():
+                    getattr(generator, kind)(number, start, stop)
+                state.done[kind] = number + 1
+                state.save()
+                rows += stop - start
+                self.stdout.write(
+                    f'{kind}: {stop} из {volumes[kind]}, '
+                    f'{rows / (time.monotonic() - started):.0f} строк/с'
+                )
+        if not state.refreshed:
+            self.stdout.write(
+                'Счётчики, поисковый индекс и ленты подписок...')
+            with transaction.atomic():
+                fake_data.reset_sequences()
+                bulk_import.refresh(generator.new_posts())
+            # Тегов новых авторов и групп слишком много, проще сбросить всё
+            cache.clear()
+            state.refreshed = True
+            state.save()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {volumes}, зерно {options["seed"]}'
+        ))
+        if options['images']:
+            self.stdout.write(
+                'Миниатюры можно построить заранее: '
+                'manage.py pregenerate_thumbnails'
+            )
@@ -0,0 +1,71 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import bulk_import
+
+
+class Command(BaseCommand):
+    help = 'Импортирует группы, посты или подписки из JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=bulk_import.KINDS)
+        parser.add_argument('path', help='Файл для импорта, «-» — stdin.')
+        parser.add_argument(
+            '--format', choices=bulk_import.FORMATS, default=None,
+            help='Формат файла (по умолчанию — по расширению).',
+        )
+        parser.add_argument(
+            '--images', default=None,
+            help='Каталог, относительно которого указаны картинки постов.',
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Заводить пользователей, которых нет в базе.',
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=bulk_import.CHUNK_SIZE,
+            help='Сколько строк вставлять в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl')
+        importer = bulk_import.Importer(
+            create_users=options['create_users'],
+            images_dir=options['images'],
+        )
+        started = time.monotonic()
+        done = 0
+        stream = (sys.stdin if path == '-'
+                  else open(path, encoding='utf-8', newline=''))
+        try:
+            rows = bulk_import.read_rows(stream, fmt)
+            for chunk in bulk_import.chunks(rows, options['chunk']):
+                with transaction.atomic():
+                    importer.import_chunk(options['kind'], chunk)
+                done += len(chunk)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Строк: {done}, {done / elapsed:.0f} строк/с')
+        except ValueError as error:
+            raise CommandError(f'Импорт остановлен после {done} строк: '
+                               f'{error}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            with transaction.atomic():
+                importer.finish()
+        for reason, count in importer.skipped.most_common():
+            self.stderr.write(f'{reason}: {count}')
+        elapsed = time.monotonic() - started
+        stats = importer.stats
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано за {elapsed:.1f} с: групп {stats["groups"]}, '
+            f'постов {stats["posts"]}, подписок {stats["follows"]}, '
+            f'новых пользователей {stats["users"]}; '
+            f'пропущено строк {stats["skipped"]}'
+        ))
@@ -0,0 +1,58 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заранее строит миниатюры картинок всех постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Число процессов (по умолчанию — по числу ядер).',
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=500,
+            help='Сколько картинок отдавать пулу за раз.',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .values_list('image', flat=True)
+            .distinct()
+            .iterator()
+        )
+        done = failed = 0
+        with thumbnails.make_executor(options['workers']) as pool:
+            chunk = []
+            for name in names:
+                chunk.append(name)
+                if len(chunk) == options['chunk']:
+                    done, failed = self.run_chunk(pool, chunk, done, failed)
+                    chunk = []
+            if chunk:
+                done, failed = self.run_chunk(pool, chunk, done, failed)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово миниатюр: {done}, ошибок: {failed}'
+        ))
+
+    def run_chunk(self, pool, names, done, failed):
+        futures = {
+            pool.submit(thumbnails.generate, name): name
+            for name in names
+            if thumbnails.ready_thumbnail(name) is None
+        }
+        done += len(names) - len(futures)
+        for future in as_completed(futures):
+            try:
+                thumbnails.register(*future.result())
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{futures[future]}: {error}')
+            else:
+                done += 1
+        return done, failed
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов.'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError(
+                'Полнотекстовый поиск работает только на SQLite'
+            )
+        with transaction.atomic():
+            total = search.rebuild(
+                Post.objects.values_list('pk', 'text').iterator()
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {total}'
+        ))
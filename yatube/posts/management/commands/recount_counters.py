@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stats_updated, posts_updated = recount()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: пользователей {stats_updated}, '
+            f'постов {posts_updated}'
+        ))
@@ -0,0 +1,70 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Как posts.timeline.BACKFILL_POSTS: столько последних постов автора
+# попадает в ленту подписчика при подписке.
+BACKFILL_POSTS = 1000
+
+
+def fill_timelines(apps, schema_editor):
+    """Заполняет ленты так, как их заполнила бы подписка: последними
+    ``BACKFILL_POSTS`` постами каждого автора — одним INSERT ... SELECT."""
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    ops = schema_editor.connection.ops
+    entry = ops.quote_name(TimelineEntry._meta.db_table)
+    post = ops.quote_name(Post._meta.db_table)
+    follow = ops.quote_name(Follow._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        # DISTINCT: повторные подписки удаляются только в 0013
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} {entry} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT DISTINCT {follow}.user_id, latest.id, latest.author_id, '
+            f'latest.pub_date FROM {follow} INNER JOIN ('
+            f'SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {post}'
+            f') latest ON latest.author_id = {follow}.author_id '
+            f'WHERE latest.position <= %s '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            [BACKFILL_POSTS],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_comment_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='timeline_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:39
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = (
+        Follow.objects.values('user_id', 'author_id')
+        .annotate(total=Count('pk'), keep=Min('pk'))
+        .filter(total__gt=1)
+    )
+    affected = set()
+    for row in duplicates:
+        Follow.objects.filter(
+            user_id=row['user_id'], author_id=row['author_id']
+        ).exclude(pk=row['keep']).delete()
+        affected.update((row['user_id'], row['author_id']))
+    # 0012 посчитал подписки вместе с повторами
+    UserStats.objects.filter(user_id__in=affected).update(
+        followers_count=count_subquery(Follow.objects, 'author'),
+        following_count=count_subquery(Follow.objects, 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
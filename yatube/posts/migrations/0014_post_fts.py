@@ -0,0 +1,161 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:42
+
+import re
+
+from django.db import migrations
+
+# Копия posts.search на момент миграции: дальнейшие правки стеммера и
+# таблицы не должны менять то, что делает эта миграция. Изменения
+# стеммера применяются командой rebuild_search_index.
+FTS_TABLE = 'posts_post_fts'
+BATCH_SIZE = 1000
+
+WORD_RE = re.compile(r'\w+')
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'),
+    ('вшись', 'вши', 'в'),
+)
+ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей',
+    'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ивш', 'ывш', 'ующ'),
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('уйте', 'ейте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло',
+     'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл',
+     'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'),
+    ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'й', 'л', 'н'),
+)
+NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+    'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях',
+    'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю',
+    'я',
+)
+DERIVATIONAL = ('ость', 'ост')
+SUPERLATIVE = ('ейше', 'ейш')
+
+
+def _longest(endings):
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+ADJECTIVE = _longest(ADJECTIVE)
+NOUN = _longest(NOUN)
+
+
+def _region(word, start=0):
+    """Начало области после первого сочетания «гласная + согласная»."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(rv, endings):
+    for ending in endings:
+        if rv.endswith(ending):
+            return rv[:-len(ending)], True
+    return rv, False
+
+
+def _strip_grouped(rv, groups):
+    """Первая группа окончаний — самостоятельная, вторая — только после
+    «а» или «я»."""
+    independent, after_a = groups
+    for ending in _longest(independent + after_a):
+        if not rv.endswith(ending):
+            continue
+        if ending in independent:
+            return rv[:-len(ending)], True
+        if rv[:-len(ending)][-1:] in ('а', 'я'):
+            return rv[:-len(ending)], True
+    return rv, False
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word),
+    )
+    head, rv = word[:rv_start], word[rv_start:]
+    r2_start = max(_region(word, _region(word)) - rv_start, 0)
+
+    rv, found = _strip_grouped(rv, PERFECTIVE_GERUND)
+    if not found:
+        rv, _ = _strip(rv, REFLEXIVE)
+        rv, found = _strip(rv, ADJECTIVE)
+        if found:
+            rv, _ = _strip_grouped(rv, PARTICIPLE)
+        else:
+            rv, found = _strip_grouped(rv, VERB)
+            if not found:
+                rv, _ = _strip(rv, NOUN)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and len(rv) - len(ending) >= r2_start:
+            rv = rv[:-len(ending)]
+            break
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        rv, found = _strip(rv, SUPERLATIVE)
+        if found and rv.endswith('нн'):
+            rv = rv[:-1]
+        elif not found and rv.endswith('ь'):
+            rv = rv[:-1]
+    return head + rv
+
+
+def normalize(text):
+    """Текст поста в том виде, в котором он лежит в индексе."""
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+        f'USING fts5(text, tokenize = "unicode61 remove_diacritics 2")'
+    )
+    Post = apps.get_model('posts', 'Post')
+    post = schema_editor.quote_name(Post._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT id, text FROM {post} ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            with schema_editor.connection.cursor() as insert:
+                insert.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                    [(post_id, normalize(text)) for post_id, text in rows],
+                )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -45,9 +45,20 @@ class Post(models.Model):
     )
     # Аргумент upload_to указывает директорию,
     # в которую будут загружаться пользовательские файлы.
+    # Счётчик комментариев, его поддерживают сигналы posts.counters
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
+        # Под каждую ленту свой индекс: сортировка по дате идёт прямо
+        # по индексу, без сортировки всей выборки
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_date_idx'),
+        ]
 
     def __str__(self):
         # выводим текст поста
@@ -62,6 +73,12 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField('date published', auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return self.text
 
@@ -73,7 +90,47 @@ class Follow(models.Model):
                                related_name='following')
 
     class Meta:
-        models.UniqueConstraint(
-            fields=['user', 'author'],
-            name='unique_follow'
-        )
+        # Индекс по author создаётся для ForeignKey сам, а уникальный
+        # индекс (user, author) отвечает на проверку подписки в profile
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Строка материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date'],
+                         name='timeline_user_date_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые иначе пришлось бы считать COUNT(*)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats')
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Счётчики {self.user}'
@@ -0,0 +1,146 @@
+"""Кэш готовых страниц для анонимных посетителей.
+
+Гостям страницы ленты и поста показываются одинаково, поэтому для них
+кэшируется весь ответ целиком. Ключ строится из полного адреса —
+схемы, хоста, пути с параметрами — и языка: в RSS и Atom ссылки
+абсолютные. Страница помечается тегами (см. posts.tags), которые
+представление добавляет само, и тегами всех прочитанных при отрисовке
+записей кэша — карточек постов, поста со счётчиками; поэтому она
+устаревает ровно тогда, когда меняется что-то из показанного на ней.
+
+Если при отрисовке база не отвечает — SQLite вернул «database is
+locked» или запросы не уложились в ``DB_DEADLINE_SECONDS``, — гость
+получает последнюю удачную копию страницы, даже устаревшую, вместо
+ошибки 500. Такие ответы считаются в кэше (``stale_counts``) и пишутся
+в лог.
+
+В заголовке ``X-Cache`` ответ сообщает, откуда он взят: ``HIT`` — из
+кэша, ``MISS`` — отрисован и сохранён, ``STALE`` — устаревшая копия
+вместо ошибки, ``BYPASS`` — кэш не применялся.
+"""
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+
+from . import tags
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_SECONDS = 24 * 60 * 60
+PAGE_KEY = 'posts:page:{}'
+STALE_COUNTER_KEY = 'posts:page:stale:{}'
+# Сколько гость ждёт базу, прежде чем получить устаревшую копию.
+DB_DEADLINE_SECONDS = 2
+# Раз во столько шагов виртуальной машины SQLite проверяется срок.
+PROGRESS_STEPS = 1000
+
+
+def page_key(request):
+    raw = '|'.join([
+        request.build_absolute_uri(), translation.get_language() or '',
+    ])
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+@contextmanager
+def db_deadline(seconds):
+    """Прерывает запросы SQLite, не уложившиеся в ``seconds`` секунд:
+    они падают с ``OperationalError: interrupted``."""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    connection.ensure_connection()
+    deadline = time.monotonic() + seconds
+    connection.connection.set_progress_handler(
+        lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+    try:
+        yield
+    finally:
+        connection.connection.set_progress_handler(None, PROGRESS_STEPS)
+
+
+def _count_stale(reason):
+    key = STALE_COUNTER_KEY.format(reason)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def stale_counts():
+    """Сколько раз вместо ошибки отдана устаревшая копия, по причинам."""
+    reasons = ('deadline', 'error')
+    found = cache.get_many(
+        [STALE_COUNTER_KEY.format(reason) for reason in reasons])
+    return {
+        reason: found.get(STALE_COUNTER_KEY.format(reason), 0)
+        for reason in reasons
+    }
+
+
+def _stale_response(request, key, error):
+    """Последняя удачная копия страницы или None, если её нет."""
+    found = tags.fetch([key], stale=True)
+    if key not in found:
+        return None
+    reason = 'deadline' if str(error) == 'interrupted' else 'error'
+    _count_stale(reason)
+    logger.warning(
+        'База недоступна (%s), %s отдана из устаревшего кэша',
+        error, request.get_full_path(),
+    )
+    content, content_type = found[key]
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'STALE'
+    response['Warning'] = '110 - "Response is Stale"'
+    return response
+
+
+def cache_anonymous_page(view):
+    """Кэширует ответ представления для гостей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.user.is_authenticated
+                or request.method not in ('GET', 'HEAD')):
+            response = view(request, *args, **kwargs)
+            response['X-Cache'] = 'BYPASS'
+            return response
+        key = page_key(request)
+        found = tags.fetch([key])
+        if key in found:
+            content, content_type = found[key]
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+        else:
+            try:
+                with tags.collect() as page_tags, \
+                        db_deadline(DB_DEADLINE_SECONDS):
+                    response = view(request, *args, **kwargs)
+            except DatabaseError as error:
+                response = _stale_response(request, key, error)
+                if response is None:
+                    raise
+                patch_vary_headers(response, ['Cookie'])
+                return response
+            if (response.status_code == 200 and not response.streaming
+                    and page_tags):
+                tags.store(
+                    key,
+                    (response.content, response['Content-Type']),
+                    page_tags,
+                    PAGE_CACHE_SECONDS,
+                )
+                response['X-Cache'] = 'MISS'
+            else:
+                response['X-Cache'] = 'BYPASS'
+        patch_vary_headers(response, ['Cookie'])
+        return response
+    return wrapper
@@ -0,0 +1,194 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.utils.dateparse import parse_datetime
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
+# Направления курсора: к более старым или к более новым записям.
+OLDER = 'o'
+NEWER = 'n'
+
+# Пропуск в списке номеров страниц.
+ELLIPSIS = '…'
+
+
+def _cursor_key(post, date_field):
+    # Строки values() — словари, остальное — объекты моделей
+    if isinstance(post, dict):
+        return post[date_field], post['id']
+    return getattr(post, date_field), post.pk
+
+
+def encode_cursor(direction, post, date_field='pub_date'):
+    """Непрозрачный курсор из (дата, id) граничной записи."""
+    date, pk = _cursor_key(post, date_field)
+    raw = f'{direction}|{date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; для испорченного курсора возвращает None."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+    if direction not in (OLDER, NEWER) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPage(Sequence):
+    """Страница ленты без общего количества записей и номеров страниц."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 date_field='pub_date', ascending=False):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.date_field = date_field
+        self.ascending = ascending
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(
+                NEWER if self.ascending else OLDER,
+                self.object_list[-1], self.date_field,
+            )
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(
+                OLDER if self.ascending else NEWER,
+                self.object_list[0], self.date_field,
+            )
+        return None
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (дата, id).
+
+    Вместо OFFSET каждая страница начинается с условия по ключу
+    сортировки, поэтому страница N стоит столько же, сколько первая,
+    и COUNT(*) не нужен. По умолчанию записи идут от новых к старым,
+    с ``ascending=True`` — от старых к новым.
+    """
+
+    def __init__(self, queryset, per_page, date_field='pub_date',
+                 ascending=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+        self.ascending = ascending
+
+    def get_page(self, cursor):
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self._page(NEWER if self.ascending else OLDER, None, None)
+        return self._page(*decoded)
+
+    def _queryset(self, direction, date, pk):
+        """Записи после курсора в порядке чтения."""
+        field = self.date_field
+        # Условие «(дата, id) после курсора» записано как диапазон по дате
+        # и исключение записей с той же датой: через OR SQLite не может
+        # начать чтение индекса с курсора и сортирует всё, что за ним
+        if direction == OLDER:
+            queryset = self.queryset.order_by(f'-{field}', '-pk')
+            if date is not None:
+                queryset = queryset.filter(
+                    **{f'{field}__lte': date}
+                ).exclude(**{field: date, 'pk__gte': pk})
+        else:
+            queryset = self.queryset.order_by(field, 'pk')
+            if date is not None:
+                queryset = queryset.filter(
+                    **{f'{field}__gte': date}
+                ).exclude(**{field: date, 'pk__lte': pk})
+        return queryset
+
+    def _page(self, direction, date, pk):
+        queryset = self._queryset(direction, date, pk)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        # Листаем ли мы в порядке показа или назад, к началу списка
+        forward = (direction == NEWER) == self.ascending
+        if forward:
+            has_next, has_previous = has_more, date is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        return CursorPage(
+            rows, has_next, has_previous, self.date_field, self.ascending)
+
+
+def elided_page_range(num_pages, number, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: первые и последние ``on_ends``
+    страниц и по ``on_each_side`` соседей текущей, пропуски — ELLIPSIS.
+
+    Список всех страниц не строится, так что лента на тысячи страниц
+    даёт лишь десяток ссылок.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        yield from range(1, num_pages + 1)
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+def paginate(request, post_list, per_page=POSTS_PER_PAGE, count=None):
+    """Страница ленты для запроса.
+
+    Если в запросе есть параметр ``cursor``, лента отдаётся keyset-
+    страницей (ссылки «новее/старее»), иначе — обычной страницей
+    ``Paginator`` с номерами. Известное заранее число записей ``count``
+    избавляет ``Paginator`` от запроса COUNT(*).
+    """
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        return CursorPaginator(post_list, per_page).get_page(cursor)
+    paginator = Paginator(post_list, per_page)
+    if count is not None:
+        paginator.count = count
+    return paginator.get_page(request.GET.get('page'))
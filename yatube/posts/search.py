@@ -0,0 +1,303 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+В виртуальной таблице ``posts_post_fts`` лежат не исходные тексты, а
+их основы: каждое слово проходит через русский стеммер (упрощённый
+Snowball). Поисковый запрос стеммится так же, и каждое слово ищется как
+префикс, поэтому «котами» находит «кот», «коты» и «котёнок», а
+недописанное слово находит полное.
+
+Индекс обновляют сигналы ``Post``; пересобрать его целиком можно
+командой ``manage.py rebuild_search_index``.
+"""
+import base64
+import binascii
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .pagination import POSTS_PER_PAGE, CursorPage
+
+FTS_TABLE = 'posts_post_fts'
+BATCH_SIZE = 1000
+
+WORD_RE = re.compile(r'\w+')
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'),
+    ('вшись', 'вши', 'в'),
+)
+ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей',
+    'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ивш', 'ывш', 'ующ'),
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('уйте', 'ейте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло',
+     'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл',
+     'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'),
+    ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'й', 'л', 'н'),
+)
+NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+    'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях',
+    'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю',
+    'я',
+)
+DERIVATIONAL = ('ость', 'ост')
+SUPERLATIVE = ('ейше', 'ейш')
+
+
+def _longest(endings):
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+ADJECTIVE = _longest(ADJECTIVE)
+NOUN = _longest(NOUN)
+
+
+def _region(word, start=0):
+    """Начало области после первого сочетания «гласная + согласная»."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(rv, endings):
+    for ending in endings:
+        if rv.endswith(ending):
+            return rv[:-len(ending)], True
+    return rv, False
+
+
+def _strip_grouped(rv, groups):
+    """Первая группа окончаний — самостоятельная, вторая — только после
+    «а» или «я»."""
+    independent, after_a = groups
+    for ending in _longest(independent + after_a):
+        if not rv.endswith(ending):
+            continue
+        if ending in independent:
+            return rv[:-len(ending)], True
+        if rv[:-len(ending)][-1:] in ('а', 'я'):
+            return rv[:-len(ending)], True
+    return rv, False
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word),
+    )
+    head, rv = word[:rv_start], word[rv_start:]
+    r2_start = max(_region(word, _region(word)) - rv_start, 0)
+
+    rv, found = _strip_grouped(rv, PERFECTIVE_GERUND)
+    if not found:
+        rv, _ = _strip(rv, REFLEXIVE)
+        rv, found = _strip(rv, ADJECTIVE)
+        if found:
+            rv, _ = _strip_grouped(rv, PARTICIPLE)
+        else:
+            rv, found = _strip_grouped(rv, VERB)
+            if not found:
+                rv, _ = _strip(rv, NOUN)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and len(rv) - len(ending) >= r2_start:
+            rv = rv[:-len(ending)]
+            break
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        rv, found = _strip(rv, SUPERLATIVE)
+        if found and rv.endswith('нн'):
+            rv = rv[:-1]
+        elif not found and rv.endswith('ь'):
+            rv = rv[:-1]
+    return head + rv
+
+
+def normalize(text):
+    """Текст поста в том виде, в котором он лежит в индексе."""
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе FTS5 MATCH: все слова как
+    префиксы основ. Для запроса без слов возвращает None."""
+    stems = [stem(word) for word in WORD_RE.findall(query)]
+    stems = [word for word in stems if word]
+    if not stems:
+        return None
+    return ' '.join(f'"{word}"*' for word in stems)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, normalize(post.text)],
+        )
+
+
+def unindex_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild(posts):
+    """Заполняет индекс заново из ``posts`` — пар (id, text).
+
+    Возвращает число проиндексированных постов.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    return index_many(posts)
+
+
+def index_many(posts):
+    """Добавляет в индекс посты — пары (id, text); тех, что уже есть в
+    индексе, среди них быть не должно (см. ``unindexed``).
+
+    Возвращает число проиндексированных постов.
+    """
+    total = 0
+    with connection.cursor() as cursor:
+        batch = []
+        for post_id, text in posts:
+            batch.append((post_id, normalize(text)))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                    batch,
+                )
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                batch,
+            )
+            total += len(batch)
+    return total
+
+
+class _Subquery(RawSQL):
+    """Подзапрос для ``__in``: Django 2.2 сам берёт его в скобки, а
+    RawSQL добавляет вторые, и SQLite читает ``IN ((SELECT ...))`` как
+    скалярный подзапрос — только первую строку."""
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def unindexed(posts):
+    """Посты из queryset ``posts``, которых ещё нет в индексе."""
+    return posts.exclude(
+        pk__in=_Subquery(f'SELECT rowid FROM {FTS_TABLE}', []))
+
+
+def matching_ids(expression):
+    """Подзапрос с id постов, подходящих под выражение, для pk__in."""
+    return _Subquery(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression],
+    )
+
+
+def ranked_ids(expression, limit, after=None):
+    """Id постов по убыванию релевантности (bm25), keyset-страницей.
+
+    ``after`` — пара (rank, id) последнего поста предыдущей страницы.
+    Возвращает список пар (rank, id).
+    """
+    sql = (
+        f'SELECT bm25({FTS_TABLE}) AS score, rowid FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [expression]
+    if after is not None:
+        sql += (
+            f' AND (bm25({FTS_TABLE}) > %s'
+            f' OR (bm25({FTS_TABLE}) = %s AND rowid > %s))'
+        )
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY score, rowid LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def encode_cursor(score, post_id):
+    raw = f'{score!r}|{post_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, post_id = base64.urlsafe_b64decode(
+            padded.encode()).decode().split('|')
+        return float(score), int(post_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+class SearchPage(CursorPage):
+    """Страница результатов поиска, курсор — (релевантность, id)."""
+
+    def __init__(self, object_list, has_next, has_previous, next_key):
+        super().__init__(object_list, has_next, has_previous)
+        self.next_key = next_key
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return encode_cursor(*self.next_key)
+        return None
+
+    @property
+    def previous_cursor(self):
+        return None
+
+
+def search_page(query, cursor=None, per_page=POSTS_PER_PAGE):
+    """Страница постов по запросу, самые релевантные первыми."""
+    expression = match_expression(query)
+    if expression is None or not is_available():
+        return SearchPage([], False, False, None)
+    after = decode_cursor(cursor) if cursor else None
+    rows = ranked_ids(expression, per_page + 1, after)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for _, post_id in rows]
+    )
+    return SearchPage(
+        [posts[post_id] for _, post_id in rows if post_id in posts],
+        has_next=has_next,
+        has_previous=after is not None,
+        next_key=rows[-1] if rows else None,
+    )
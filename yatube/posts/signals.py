@@ -0,0 +1,124 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, search, tags, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.create_stats(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(instance.author_id, followers_count=1)
+        counters.bump(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.bump(instance.author_id, followers_count=-1)
+    counters.bump(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_text(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю группу поста: её страницу тоже надо сбросить."""
+    if instance.pk and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_tags(sender, instance, **kwargs):
+    group_ids = {
+        instance.group_id, getattr(instance, '_previous_group_id', None)
+    } - {None}
+    tags.invalidate_on_commit(
+        'feed',
+        f'post:{instance.pk}',
+        f'author-posts:{instance.author_id}',
+        *(f'group-posts:{group_id}' for group_id in group_ids),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_comment_tags(sender, instance, **kwargs):
+    tags.invalidate_on_commit(f'comments:{instance.post_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_tags(sender, instance, **kwargs):
+    # Посты в копии главной лежат вместе со своими группами
+    tags.invalidate_on_commit(
+        'feed', 'groups', f'group:{instance.pk}',
+        f'group-posts:{instance.pk}',
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_user_tags(sender, instance, created=False, update_fields=None,
+                    **kwargs):
+    # Новый пользователь ещё нигде не показан, а вход в систему обновляет
+    # только last_login
+    if created or update_fields and set(update_fields) == {'last_login'}:
+        return
+    # Посты в копии главной лежат вместе со своими авторами
+    tags.invalidate_on_commit('feed', 'authors', f'author:{instance.pk}')
@@ -0,0 +1,152 @@
+"""Сброс кэша по тегам.
+
+Каждая запись кэша помечается тегами — тем, от чего зависит её
+содержимое, — и хранит версии этих тегов на момент построения. Версия
+тега лежит в кэше, и сбросить тег — значит записать новую версию:
+записи с ним не удаляются, а при чтении оказываются устаревшими, и их
+вытесняет из кэша. Версия — это время последнего сброса в наносекундах,
+поэтому по ней же считается ``Last-Modified`` (см. posts.conditional).
+
+Теги приложения:
+
+* ``feed`` — список всех постов (главная);
+* ``post:<id>`` — сам пост (текст, картинка, группа);
+* ``comments:<id>`` — комментарии поста;
+* ``author:<id>`` — данные пользователя (имя);
+* ``author-posts:<id>`` — список постов автора;
+* ``group:<id>`` — данные группы (название, slug, описание);
+* ``group-posts:<id>`` — список постов группы;
+* ``stats:<id>`` — счётчики пользователя;
+* ``authors`` и ``groups`` — данные любого пользователя или группы, для
+  страниц, где их слишком много, чтобы перечислять теги по одному.
+
+Сбрасывают теги сигналы моделей (см. posts.signals) — через
+``invalidate_on_commit``, ещё раз после фиксации транзакции.
+
+Запись, построенная внутри ``collect()``, наследует теги всех прочитанных
+при этом записей: страница, собранная из карточек постов, устареет,
+когда устареет любая из карточек.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+TAG_KEY = 'posts:tag:{}'
+
+_local = threading.local()
+# Версия тега, которую надо прочитать при сохранении записи.
+_CURRENT = object()
+
+
+def _collectors():
+    if not hasattr(_local, 'collectors'):
+        _local.collectors = []
+    return _local.collectors
+
+
+def versions(tags):
+    """Текущие версии тегов; у тега, которого нет в кэше, версия None."""
+    keys = {TAG_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    return {tag: found.get(key) for key, tag in keys.items()}
+
+
+def invalidate(*tags):
+    """Делает устаревшими все записи с любым из тегов."""
+    keys = [TAG_KEY.format(tag) for tag in set(tags)]
+    current = cache.get_many(keys)
+    now = time.time_ns()
+    # Версия растёт, даже если два сброса пришлись на одну наносекунду
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def invalidate_on_commit(*tags):
+    """Сбрасывает теги сейчас и ещё раз, когда транзакция зафиксирована.
+
+    Кэш — отдельная база: новую версию тега другие процессы видят
+    раньше, чем записи транзакции, и запись, построенную ими в этот
+    промежуток из старых данных, надо сбросить повторно. Первый сброс
+    нужен самой транзакции — её чтения из кэша видят изменения.
+    """
+    invalidate(*tags)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: invalidate(*tags))
+
+
+@contextmanager
+def collect():
+    """Собирает теги записей, прочитанных внутри блока."""
+    collected = {}
+    _collectors().append(collected)
+    try:
+        yield collected
+    finally:
+        _collectors().pop()
+
+
+def add(*tags, tag_versions=None):
+    """Добавляет теги в собираемые ``collect()`` наборы.
+
+    Без ``tag_versions`` версия будет прочитана при сохранении записи.
+    """
+    for collected in _collectors():
+        for tag in tags:
+            collected.setdefault(tag, _CURRENT)
+        for tag, version in (tag_versions or {}).items():
+            collected[tag] = version
+
+
+def fetch(keys, stale=False):
+    """Неустаревшие записи по ключам ``keys`` — словарь ключ: значение.
+
+    С ``stale=True`` отдаёт и устаревшие записи, пока они не вытеснены
+    из кэша, — на случай, когда построить свежие не получается.
+    """
+    entries = cache.get_many(list(keys))
+    if stale or not entries:
+        return {key: entry['value'] for key, entry in entries.items()}
+    current = versions({
+        tag for entry in entries.values() for tag in entry['tags']
+    })
+    found = {}
+    for key, entry in entries.items():
+        if all(current[tag] == version
+               for tag, version in entry['tags'].items()):
+            found[key] = entry['value']
+            add(tag_versions=entry['tags'])
+    return found
+
+
+def store(key, value, tags, timeout=DEFAULT_TIMEOUT):
+    """Сохраняет запись с тегами.
+
+    ``tags`` — список тегов или словарь тег: версия, снятый через
+    ``versions`` до построения значения (так запись не переживёт сброс,
+    случившийся во время построения).
+    """
+    if not isinstance(tags, dict):
+        tags = versions(tags)
+    unresolved = [tag for tag, version in tags.items()
+                  if version is _CURRENT]
+    if unresolved:
+        tags = {**tags, **versions(unresolved)}
+    cache.set(key, {'value': value, 'tags': tags}, timeout)
+    add(tag_versions=tags)
+
+
+def get_or_set(key, tags, build, timeout=DEFAULT_TIMEOUT):
+    """Запись из кэша или результат ``build()``, сохранённый с тегами."""
+    found = fetch([key])
+    if key in found:
+        return found[key]
+    snapshot = versions(tags)
+    value = build()
+    store(key, value, snapshot, timeout)
+    return value
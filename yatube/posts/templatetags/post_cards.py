@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """Карточка поста для лент, из кэша, если она там есть."""
+    return mark_safe(cards.render_card(post))
@@ -0,0 +1,12 @@
+from django import template
+
+from posts.pagination import elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_links(page_obj):
+    """Номера страниц вокруг текущей, с пропусками (см. elided_page_range)."""
+    return list(elided_page_range(
+        page_obj.paginator.num_pages, page_obj.number))
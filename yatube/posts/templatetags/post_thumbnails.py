@@ -0,0 +1,18 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(image):
+    """Готовая миниатюра картинки поста или заглушка, пока её строят.
+
+    Сам тег миниатюры не строит: их заказывают post_create/post_edit,
+    а для старых постов — команда pregenerate_thumbnails.
+    """
+    thumbnail = None
+    if image:
+        thumbnail = thumbnails.ready_thumbnail(image.name)
+    return {'image': image, 'thumbnail': thumbnail}
@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.pagination import COMMENTS_PER_PAGE
+from posts.tests.utils import max_queries
+
+User = get_user_model()
+
+
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=cls.group)
+            for number in range(15)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cursor_walks_feed(self):
+        url = reverse('posts:api_index')
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(url, {'cursor': first['next']}).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        self.assertEqual(
+            [post['id'] for post in first['results'] + second['results']],
+            [post.pk for post in reversed(self.posts)],
+        )
+
+    def test_post_fields(self):
+        post = self.client.get(reverse('posts:api_index')).json()[
+            'results'][-1]
+        self.assertEqual(post['text'], 'Пост 5')
+        self.assertEqual(
+            post['author'], {'username': 'author', 'name': 'Лев Толстой'})
+        self.assertEqual(post['group'], {'slug': 'group', 'title': 'Группа'})
+        self.assertIsNone(post['image'])
+
+    def test_fields_selection(self):
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'id,text', 'limit': 2})
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.posts[14].pk, 'text': 'Пост 14'},
+             {'id': self.posts[13].pk, 'text': 'Пост 13'}],
+        )
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_feeds(self):
+        urls = [
+            reverse('posts:api_group', kwargs={'slug': 'group'}),
+            reverse('posts:api_profile', kwargs={'username': 'author'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url), max_queries(2):
+                self.assertEqual(
+                    len(self.client.get(url).json()['results']), 10)
+        response = self.client.get(
+            reverse('posts:api_group', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_feed_needs_login(self):
+        url = reverse('posts:api_follow')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        self.assertEqual(len(self.client.get(url).json()['results']), 10)
+
+    def test_post_with_comments(self):
+        post = self.posts[0]
+        with max_queries(2):
+            data = self.client.get(
+                reverse('posts:api_post', kwargs={'post_id': post.pk})
+            ).json()
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(
+            [(comment['author'], comment['text'])
+             for comment in data['comments']],
+            [('reader', 'Комментарий')],
+        )
+        self.assertIsNone(data['comments_next'])
+        response = self.client.get(
+            reverse('posts:api_post', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_walks_comments(self):
+        post = self.posts[1]
+        comments = [
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {number}')
+            for number in range(COMMENTS_PER_PAGE + 5)
+        ]
+        url = reverse('posts:api_post', kwargs={'post_id': post.pk})
+        first = self.client.get(url).json()
+        self.assertIsNone(first['comments_previous'])
+        second = self.client.get(
+            url, {'comments_cursor': first['comments_next']}).json()
+        self.assertIsNone(second['comments_next'])
+        self.assertEqual(
+            [comment['id']
+             for comment in first['comments'] + second['comments']],
+            [comment.pk for comment in comments],
+        )
+        back = self.client.get(
+            url, {'comments_cursor': second['comments_previous']}).json()
+        self.assertEqual(back['comments'], first['comments'])
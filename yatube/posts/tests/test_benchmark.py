@@ -0,0 +1,97 @@
+import json
+import random
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase
+
+from posts import benchmark
+from posts.management.commands.benchmark import Command
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+VOLUMES = {
+    'users': 5,
+    'groups': 2,
+    'posts': 30,
+    'follows': 8,
+    'comments': 10,
+}
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.data = benchmark.seed(random.Random(0), VOLUMES)
+
+    def test_seed_volumes(self):
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 10)
+        # Повторы и подписки на себя отброшены
+        self.assertLessEqual(Follow.objects.count(), 8)
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)), 30)
+        self.assertEqual(len(self.data.post_ids), 30)
+
+    def test_every_scenario_measured(self):
+        for scenario in benchmark.SCENARIOS:
+            with self.subTest(view=scenario.name):
+                samples, seconds = benchmark.measure(
+                    scenario, self.data, requests=3, threads=1)
+                result = benchmark.report(samples, seconds)
+                self.assertEqual(result['requests'], 3)
+                self.assertEqual(result['errors'], 0)
+                self.assertGreater(result['queries_max'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_locked_database_counted_as_error(self):
+        scenario = benchmark.SCENARIOS[0]
+        with mock.patch('posts.benchmark.Client.get',
+                        side_effect=OperationalError('database is locked')):
+            samples, seconds = benchmark.measure(
+                scenario, self.data, requests=2, threads=1)
+        self.assertEqual(benchmark.report(samples, seconds)['errors'], 2)
+        with mock.patch('posts.benchmark.Client.get',
+                        side_effect=KeyError('broken')):
+            with self.assertRaises(KeyError):
+                benchmark.measure(scenario, self.data, requests=1, threads=1)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
+
+    def test_compare_with_baseline(self):
+        baseline = {'index': {'p95_ms': 10, 'rps': 100, 'queries_max': 2}}
+        same = {'index': {'p95_ms': 10.5, 'rps': 96, 'queries_max': 2}}
+        self.assertEqual(benchmark.compare(same, baseline, 10), [])
+        worse = {
+            'index': {'p95_ms': 20, 'rps': 50, 'queries_max': 3},
+            'new_view': {'p95_ms': 1, 'rps': 1, 'queries_max': 1},
+        }
+        self.assertEqual(len(benchmark.compare(worse, baseline, 10)), 3)
+
+
+class BenchmarkCommandTest(TestCase):
+    def test_separate_cache_and_database(self):
+        def run(command, options, volumes):
+            return {'views': {}, 'cache': settings.CACHES['default']}
+
+        test_settings = connection.settings_dict['TEST']
+        stdout = StringIO()
+        with mock.patch.object(connection.creation, 'create_test_db'), \
+                mock.patch.object(connection.creation, 'destroy_test_db'), \
+                mock.patch.object(Command, 'run', run):
+            call_command('benchmark', stdout=stdout, stderr=StringIO())
+        used = json.loads(stdout.getvalue())['cache']
+        self.assertNotEqual(
+            used['LOCATION'], settings.CACHES['default']['LOCATION'])
+        self.assertEqual(
+            used['OPTIONS'], settings.CACHES['default']['OPTIONS'])
+        self.assertEqual(connection.settings_dict['TEST'], test_settings)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cache import INDEX_LOCK_KEY
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {number}', group=self.group)
+            for number in range(3)
+        ]
+        # Авторизованным страница целиком не кэшируется — только карточки
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def rendered_cards(self, url):
+        with mock.patch('posts.cards.render_to_string',
+                        wraps=render_to_string) as render:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return render.call_count
+
+    def test_cards_shared_between_feeds(self):
+        self.assertEqual(self.rendered_cards(reverse('posts:index')), 3)
+        self.assertEqual(self.rendered_cards(reverse('posts:index')), 0)
+        self.assertEqual(self.rendered_cards(
+            reverse('posts:group_list', kwargs={'slug': 'group'})), 0)
+        self.assertEqual(self.rendered_cards(
+            reverse('posts:profile', kwargs={'username': 'author'})), 0)
+
+    def test_edit_rerenders_only_its_card(self):
+        self.rendered_cards(reverse('posts:index'))
+        post = self.posts[0]
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertEqual(self.rendered_cards(reverse('posts:index')), 1)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_author_change_rerenders_all_cards(self):
+        self.rendered_cards(reverse('posts:index'))
+        self.author.first_name = 'Лев'
+        self.author.save()
+        self.assertEqual(self.rendered_cards(reverse('posts:index')), 3)
+
+    def test_card_from_stale_feed_copy_not_kept(self):
+        self.client.get(reverse('posts:index'))
+        cache.add(INDEX_LOCK_KEY, True)
+        post = self.posts[0]
+        post.text = 'Исправленный пост'
+        post.save()
+        # Ленту пересчитывает другой процесс: карточка из старой копии
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост 0')
+        cache.delete(INDEX_LOCK_KEY)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+from posts.tests.utils import max_queries
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group)
+        self.guest_client = Client()
+        self.urls = {
+            'group': reverse('posts:group_list', kwargs={'slug': 'group'}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'author'}),
+            'post': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}),
+        }
+
+    def revalidate(self, url, client=None, **headers):
+        client = client or self.guest_client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+
+    def test_unchanged_pages_not_modified(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.guest_client.get(url)['ETag']
+                with max_queries(1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_for_guests(self):
+        response = self.guest_client.get(self.urls['group'])
+        response = self.guest_client.get(
+            self.urls['group'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_produce_new_validators(self):
+        etags = {
+            name: self.guest_client.get(url)['ETag']
+            for name, url in self.urls.items()
+        }
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий')
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_etag_depends_on_user(self):
+        client = Client()
+        client.force_login(self.author)
+        url = self.urls['post']
+        guest_etag = self.guest_client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=guest_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.revalidate(url, client).status_code, 304)
+
+    def test_missing_page_has_no_validators(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
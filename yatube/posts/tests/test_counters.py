@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_posts_and_comments_counted(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Comment.objects.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_follows_counted(self):
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_recount_command_repairs_counters(self):
+        Post.objects.bulk_create(
+            [Post(author=self.author, text=str(n)) for n in range(3)]
+        )
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 3)
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+
+    def test_profile_uses_counter(self):
+        Post.objects.create(author=self.author, text='Пост')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertEqual(response.context['counter'], 1)
+
+    def test_deleting_user_keeps_counters_consistent(self):
+        Post.objects.create(author=self.author, text='Пост')
+        author_id = self.author.pk
+        self.author.delete()
+        self.assertFalse(UserStats.objects.filter(user_id=author_id))
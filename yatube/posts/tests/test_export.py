@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import export
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост с картинкой', group=group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        Post.objects.create(author=self.author, text='Просто пост')
+        other_post = Post.objects.create(author=self.other, text='Чужой')
+        Comment.objects.create(
+            post=other_post, author=self.author, text='Мой комментарий')
+        Comment.objects.create(
+            post=self.post, author=self.other, text='Чужой комментарий')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def download(self):
+        response = self.client.get(reverse('posts:export'))
+        self.assertTrue(response.streaming)
+        return response, zipfile.ZipFile(
+            BytesIO(b''.join(response.streaming_content)))
+
+    def test_archive_contents(self):
+        response, archive = self.download()
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('attachment', response['Content-Disposition'])
+        image = f'media/{self.post.image.name}'
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(['posts.json', 'comments.json', image]),
+        )
+        posts = json.loads(archive.read('posts.json'))
+        self.assertEqual(
+            [post['text'] for post in posts],
+            ['Пост с картинкой', 'Просто пост'],
+        )
+        self.assertEqual(posts[0]['image'], image)
+        self.assertEqual(posts[0]['group']['slug'], 'group')
+        self.assertIsNone(posts[1]['group'])
+        comments = json.loads(archive.read('comments.json'))
+        self.assertEqual(
+            [comment['text'] for comment in comments], ['Мой комментарий'])
+        self.assertEqual(archive.read(image), SMALL_GIF)
+        self.assertEqual(
+            archive.getinfo(image).compress_type, zipfile.ZIP_STORED)
+
+    def test_archive_sent_in_chunks(self):
+        # Случайный текст почти не сжимается и быстро заполняет куски
+        Post.objects.bulk_create(
+            Post(author=self.author, text=os.urandom(1000).hex())
+            for _ in range(100)
+        )
+        with mock.patch.object(export, 'CHUNK_SIZE', 256):
+            chunks = list(export.stream(self.author))
+        self.assertGreater(len(chunks), 2)
+        archive = zipfile.ZipFile(BytesIO(b''.join(chunks)))
+        self.assertEqual(len(json.loads(archive.read('posts.json'))), 102)
+
+    def test_missing_image_skipped(self):
+        os.remove(self.post.image.path)
+        _, archive = self.download()
+        self.assertEqual(
+            sorted(archive.namelist()), ['comments.json', 'posts.json'])
+
+    def test_guest_redirected_to_login(self):
+        response = Client().get(reverse('posts:export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_archive(self):
+        output = os.path.join(TEMP_MEDIA_ROOT, 'export.zip')
+        call_command(
+            'export_account', 'author', output=output, stdout=StringIO())
+        with zipfile.ZipFile(output) as archive:
+            self.assertIn('posts.json', archive.namelist())
@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts import fake_data
+from posts.models import (
+    Comment, Follow, Group, Post, TimelineEntry, User, UserStats,
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+VOLUMES = {
+    'users': 30,
+    'groups': 4,
+    'follows': 60,
+    'posts': 45,
+    'comments': 50,
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch.object(fake_data, 'CHUNK_SIZE', 20)
+class GenerateDataTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        self.state = os.path.join(workdir, 'state.json')
+
+    def generate(self, **options):
+        call_command(
+            'generate_data', state=self.state, stdout=StringIO(),
+            **{**VOLUMES, **options},
+        )
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('pk').values_list(
+                'username', 'first_name')),
+            list(Post.objects.order_by('pk').values_list(
+                'text', 'author_id', 'group_id', 'pub_date', 'image')),
+            list(Comment.objects.order_by('pk').values_list(
+                'post_id', 'author_id', 'text', 'created')),
+            sorted(Follow.objects.values_list('user_id', 'author_id')),
+        )
+
+    def test_volumes_and_derived_data(self):
+        self.generate(images=2, image_share=0.5)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 45)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertLessEqual(Follow.objects.count(), 60)
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)), 45)
+        self.assertEqual(
+            sum(Post.objects.values_list('comments_count', flat=True)), 50)
+        # Каждый пост автора попал в ленту каждого его подписчика
+        self.assertEqual(TimelineEntry.objects.count(), sum(
+            UserStats.objects.get(user_id=author_id).posts_count
+            for author_id in Follow.objects.values_list(
+                'author_id', flat=True)
+        ))
+        images = set(Post.objects.exclude(image='').values_list(
+            'image', flat=True))
+        self.assertTrue(images)
+        for name in images:
+            self.assertTrue(
+                os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name)))
+
+    def test_dates_grow_with_ids(self):
+        self.generate()
+        dates = list(Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True))
+        self.assertEqual(dates, sorted(dates))
+        for comment in Comment.objects.select_related('post'):
+            self.assertGreaterEqual(comment.created, comment.post.pub_date)
+
+    def test_followers_skewed(self):
+        self.generate()
+        counts = sorted(UserStats.objects.values_list(
+            'followers_count', flat=True), reverse=True)
+        # У самого популярного автора подписчиков больше, чем у десятка
+        # последних вместе взятых
+        self.assertGreater(counts[0], sum(counts[-10:]))
+
+    def test_same_seed_same_data(self):
+        self.generate()
+        first = self.snapshot()
+        os.remove(self.state)
+        for model in (Comment, Follow, Post, Group, User):
+            model.objects.all().delete()
+        self.generate()
+        second = self.snapshot()
+        # Новые id начинаются после старых, содержимое то же
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(
+            [row[0] for row in first[1]], [row[0] for row in second[1]])
+
+    def test_resume_after_interruption(self):
+        self.generate()
+        complete = self.snapshot()
+        for model in (Comment, Follow, Post, Group, User):
+            model.objects.all().delete()
+        os.remove(self.state)
+        # Падаем на второй порции постов
+        original = fake_data.Generator.posts
+
+        def failing(generator, number, start, stop):
+            if number == 1:
+                raise RuntimeError('прервано')
+            return original(generator, number, start, stop)
+
+        with mock.patch.object(fake_data.Generator, 'posts', failing):
+            with self.assertRaises(RuntimeError):
+                self.generate()
+        with open(self.state, encoding='utf-8') as source:
+            self.assertEqual(json.load(source)['done']['posts'], 1)
+        self.assertEqual(Post.objects.count(), 20)
+        self.generate()
+        resumed = self.snapshot()
+        self.assertEqual(Post.objects.count(), 45)
+        self.assertEqual(
+            [row[0] for row in complete[1]], [row[0] for row in resumed[1]])
+
+    def test_other_parameters_rejected(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate(seed=1)
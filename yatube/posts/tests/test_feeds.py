@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.tests.utils import max_queries
+
+User = get_user_model()
+
+
+class FeedsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Про всё')
+        Post.objects.create(
+            author=self.author, text='Пост в группе', group=self.group)
+        Post.objects.create(author=self.other, text='Пост без группы')
+        self.guest_client = Client()
+        self.feeds = {
+            'index_rss': reverse('posts:index_rss'),
+            'index_atom': reverse('posts:index_atom'),
+            'group_rss': reverse('posts:group_rss', kwargs={'slug': 'group'}),
+            'group_atom': reverse(
+                'posts:group_atom', kwargs={'slug': 'group'}),
+            'profile_rss': reverse(
+                'posts:profile_rss', kwargs={'username': 'author'}),
+            'profile_atom': reverse(
+                'posts:profile_atom', kwargs={'username': 'author'}),
+        }
+
+    def test_feeds_contain_stream_posts(self):
+        for name, url in self.feeds.items():
+            with self.subTest(feed=name):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('xml', response['Content-Type'])
+                self.assertContains(response, 'Пост в группе')
+                if not name.startswith('index'):
+                    self.assertNotContains(response, 'Пост без группы')
+
+    def test_missing_stream_is_404(self):
+        for url in (
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_atom', kwargs={'username': 'nobody'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_feeds_cached_and_revalidated(self):
+        for name, url in self.feeds.items():
+            with self.subTest(feed=name):
+                first = self.guest_client.get(url)
+                self.assertEqual(first['X-Cache'], 'MISS')
+                with max_queries(1):
+                    second = self.guest_client.get(url)
+                self.assertEqual(second['X-Cache'], 'HIT')
+                self.assertEqual(first.content, second.content)
+                with max_queries(1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_refreshes_feeds(self):
+        etags = {
+            name: self.guest_client.get(url)['ETag']
+            for name, url in self.feeds.items()
+        }
+        Post.objects.create(
+            author=self.author, text='Свежий пост', group=self.group)
+        for name, url in self.feeds.items():
+            with self.subTest(feed=name):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertContains(response, 'Свежий пост')
+
+    def test_feed_cached_per_host(self):
+        url = self.feeds['index_rss']
+        self.guest_client.get(url, HTTP_HOST='localhost')
+        response = self.guest_client.get(url, HTTP_HOST='127.0.0.1')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'http://127.0.0.1/')
+        self.assertNotContains(response, 'http://localhost/')
+
+    def test_other_streams_untouched(self):
+        url = self.feeds['profile_rss']
+        etag = self.guest_client.get(url)['ETag']
+        Post.objects.create(author=self.other, text='Чужой пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_link_feeds(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'group'}))
+        self.assertContains(response, self.feeds['group_rss'])
+        self.assertContains(response, self.feeds['group_atom'])
@@ -0,0 +1,58 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image
+
+from posts.forms import PostForm
+from posts.images import MAX_SIDE, normalize_image
+
+
+def uploaded_image(size, image_format='JPEG', name='photo.jpg', **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, color=(10, 120, 200)).save(
+        buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/jpeg')
+
+
+class NormalizeImageTest(TestCase):
+    def test_large_photo_downsized(self):
+        result = normalize_image(uploaded_image((MAX_SIDE * 2, MAX_SIDE)))
+        image = Image.open(result)
+        self.assertEqual(max(image.size), MAX_SIDE)
+
+    def test_exif_orientation_applied_and_stripped(self):
+        exif = Image.Exif()
+        # 6 — снимок повёрнут на 90° по часовой стрелке
+        exif[0x0112] = 6
+        result = normalize_image(
+            uploaded_image((400, 200), exif=exif.tobytes()))
+        image = Image.open(result)
+        self.assertEqual(image.size, (200, 400))
+        self.assertNotIn(0x0112, image.getexif())
+
+    def test_too_many_pixels_rejected(self):
+        with mock.patch('posts.images.MAX_PIXELS', 100):
+            with self.assertRaises(ValidationError):
+                normalize_image(uploaded_image((20, 20)))
+
+    def test_form_stores_normalized_file(self):
+        form = PostForm(
+            data={'text': 'Пост'},
+            files={'image': uploaded_image((100, 100), 'PNG', 'pic.png')},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertNotEqual(form.cleaned_data['image'].name, 'pic.png')
+        self.assertTrue(form.cleaned_data['image'].name.startswith('pic.'))
+
+    def test_truncated_file_is_form_error(self):
+        image = uploaded_image((800, 600), quality=95)
+        truncated = SimpleUploadedFile(
+            'photo.jpg', image.read()[:image.size // 2],
+            content_type='image/jpeg')
+        form = PostForm(data={'text': 'Пост'}, files={'image': truncated})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
@@ -0,0 +1,173 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import bulk_import, search
+from posts.models import Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportContentTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.data_dir, name)
+        with open(path, 'w', encoding='utf-8') as data:
+            data.write(content)
+        return path
+
+    def write_jsonl(self, name, rows):
+        return self.write(
+            name, ''.join(json.dumps(row) + '\n' for row in rows))
+
+    def run_import(self, *args, **options):
+        call_command(
+            'import_content', *args, stdout=StringIO(), stderr=StringIO(),
+            **options,
+        )
+
+    def test_import_groups_from_csv(self):
+        path = self.write(
+            'groups.csv',
+            'slug,title,description\n'
+            'cats,Коты,Про котов\n'
+            'group,Дубль,Уже есть\n'
+            'cats,Дубль,Повтор в файле\n'
+            'dogs,Собаки,\n',
+        )
+        self.run_import('groups', path)
+        self.assertEqual(
+            list(Group.objects.order_by('slug').values_list('slug', 'title')),
+            [('cats', 'Коты'), ('dogs', 'Собаки'), ('group', 'Группа')],
+        )
+
+    def test_import_posts(self):
+        with open(os.path.join(self.data_dir, 'cat.gif'), 'wb') as image:
+            image.write(b'GIF89a')
+        path = self.write_jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Первый', 'group': 'group',
+             'pub_date': '2020-01-02T03:04:05+00:00', 'image': 'cat.gif'},
+            {'author': 'author', 'text': 'Второй'},
+            {'author': 'nobody', 'text': 'Неизвестный автор'},
+            {'author': 'author', 'text': 'Без группы', 'group': 'missing'},
+            {'author': 'author', 'text': ''},
+        ])
+        # Порции по две строки — несколько транзакций
+        self.run_import('posts', path, images=self.data_dir, chunk=2)
+        self.assertEqual(Post.objects.count(), 2)
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertTrue(first.image.name.startswith('posts/cat'))
+        second = Post.objects.get(text='Второй')
+        self.assertFalse(second.image)
+        self.assertLess(timezone.now() - second.pub_date, timedelta(minutes=1))
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 2)
+        self.assertFalse(User.objects.filter(username='nobody').exists())
+
+    def test_create_users(self):
+        path = self.write_jsonl('posts.jsonl', [
+            {'author': 'newcomer', 'text': 'Привет'},
+        ])
+        self.run_import('posts', path, create_users=True)
+        newcomer = User.objects.get(username='newcomer')
+        self.assertFalse(newcomer.has_usable_password())
+        self.assertEqual(UserStats.objects.get(user=newcomer).posts_count, 1)
+
+    def test_import_follows_fills_timeline(self):
+        Post.objects.create(author=self.author, text='Старый пост')
+        path = self.write_jsonl('follows.jsonl', [
+            {'user': 'reader', 'author': 'author'},
+            {'user': 'reader', 'author': 'author'},
+            {'user': 'reader', 'author': 'reader'},
+        ])
+        self.run_import('follows', path)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 1)
+        posts = self.write_jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Новый пост'},
+        ])
+        self.run_import('posts', posts)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2)
+
+    def test_repeated_follows_not_counted(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        importer = bulk_import.Importer()
+        importer.import_chunk('follows', [
+            {'user': 'reader', 'author': 'author'},
+            {'user': 'author', 'author': 'reader'},
+            {'user': 'author', 'author': 'reader'},
+        ])
+        self.assertEqual(importer.stats['follows'], 1)
+        self.assertEqual(importer.skipped['подписка уже есть'], 2)
+
+    def test_imported_posts_searchable(self):
+        if not search.is_available():
+            self.skipTest('Поиск работает только на SQLite')
+        path = self.write_jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Котёнок на крыше'},
+        ])
+        self.run_import('posts', path)
+        response = Client().get(reverse('posts:search'), {'q': 'котёнок'})
+        self.assertContains(response, 'Котёнок на крыше')
+
+    def test_post_saved_during_import_indexed_once(self):
+        if not search.is_available():
+            self.skipTest('Поиск работает только на SQLite')
+        importer = bulk_import.Importer()
+        importer.import_chunk('posts', [
+            {'author': 'author', 'text': 'Котёнок из файла'},
+        ])
+        # Пост с сайта: его уже проиндексировал сигнал
+        Post.objects.create(author=self.author, text='Котёнок с сайта')
+        importer.finish()
+        response = Client().get(reverse('posts:search'), {'q': 'котёнок'})
+        self.assertContains(response, 'Котёнок из файла')
+        self.assertContains(response, 'Котёнок с сайта')
+
+    def test_import_resets_cached_pages(self):
+        guest = Client()
+        url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        self.assertEqual(guest.get(url)['X-Cache'], 'MISS')
+        path = self.write_jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Импорт', 'group': 'group'},
+        ])
+        self.run_import('posts', path)
+        response = guest.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Импорт')
+
+    def test_broken_line_stops_import(self):
+        path = self.write('posts.jsonl', '{"author": "author"\n')
+        with self.assertRaises(CommandError):
+            self.run_import('posts', path)
@@ -0,0 +1,85 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from posts import timeline
+from posts.cache import feed_queryset
+from posts.models import Comment, Follow, Group, Post
+from posts.pagination import NEWER, OLDER, CursorPaginator
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса в формате SQLite')
+class QueryPlanTest(TestCase):
+    """Основной запрос каждой страницы читает таблицы по индексу."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Testik',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Test post', group=cls.group)
+
+    def assertUsesIndex(self, queryset, sorts_ties=False):
+        """С ``sorts_ties`` допустима досортировка записей с одной датой
+        по id: строки всё равно читаются по индексу, до LIMIT."""
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            with self.subTest(line=line):
+                if sorts_ties and 'FOR RIGHT PART OF ORDER BY' in line:
+                    continue
+                self.assertNotIn('USE TEMP B-TREE', line)
+                if re.search(r'\b(SCAN|SEARCH)\b', line):
+                    self.assertRegex(
+                        line, r'USING (COVERING )?INDEX|INTEGER PRIMARY KEY')
+
+    def test_feeds_use_indexes(self):
+        querysets = {
+            'index': feed_queryset()[:10],
+            'group_posts': self.group.posts.select_related(
+                'author', 'group')[:10],
+            'profile': self.author.posts.select_related(
+                'author', 'group')[:10],
+            'follow_index': timeline.timeline_posts(self.user.pk)[:20],
+        }
+        for view, queryset in querysets.items():
+            with self.subTest(view=view):
+                self.assertUsesIndex(queryset)
+
+    def test_lookups_use_indexes(self):
+        querysets = {
+            'following': Follow.objects.filter(
+                user=self.user, author=self.author),
+            'comments': Comment.objects.filter(
+                post=self.post).order_by('created'),
+        }
+        for name, queryset in querysets.items():
+            with self.subTest(name=name):
+                self.assertUsesIndex(queryset)
+
+    def test_cursor_pages_use_indexes(self):
+        """Страница по курсору начинает чтение индекса с курсора."""
+        paginators = {
+            'index': CursorPaginator(feed_queryset(), 10),
+            'group_posts': CursorPaginator(self.group.posts.all(), 10),
+            'profile': CursorPaginator(self.author.posts.all(), 10),
+            'comments': CursorPaginator(
+                self.post.comments.all(), 20, date_field='created',
+                ascending=True),
+        }
+        for view, paginator in paginators.items():
+            for direction in (OLDER, NEWER):
+                with self.subTest(view=view, direction=direction):
+                    queryset = paginator._queryset(
+                        direction, self.post.pub_date, self.post.pk)
+                    self.assertUsesIndex(queryset[:11], sorts_ties=True)
@@ -0,0 +1,34 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts.kvstore import KVStore
+
+
+class KVStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = KVStore()
+        KVStoreModel.objects.create(key='sorl||image||ready', value='{}')
+
+    def test_prefetch_loads_page_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.store.prefetch(['sorl||image||ready', 'sorl||image||none'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.store._get_raw('sorl||image||ready'), '{}')
+            self.assertIsNone(self.store._get_raw('sorl||image||none'))
+
+    def test_local_lru_is_bounded(self):
+        with mock.patch('posts.kvstore.LOCAL_MAX_ENTRIES', 2):
+            for key in ('a', 'b', 'c'):
+                self.store._set_raw(key, key)
+        self.assertEqual(list(self.store._local), ['b', 'c'])
+
+    def test_missing_entry_expires_from_memory(self):
+        self.store._get_raw('sorl||image||late')
+        KVStoreModel.objects.create(key='sorl||image||late', value='{}')
+        cache.clear()
+        with mock.patch('posts.kvstore.time.monotonic', return_value=1e12):
+            self.assertEqual(self.store._get_raw('sorl||image||late'), '{}')
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.first_group = Group.objects.create(title='Первая', slug='first')
+        self.second_group = Group.objects.create(
+            title='Вторая', slug='second')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.first_group)
+        self.guest_client = Client()
+
+    def assertCache(self, url, status):
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Cache'], status, url)
+        return response
+
+    def test_guest_pages_cached(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'first'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            first = self.assertCache(url, 'MISS')
+            second = self.assertCache(url, 'HIT')
+            self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_part_of_key(self):
+        self.assertCache(reverse('posts:index'), 'MISS')
+        self.assertCache(reverse('posts:index') + '?page=2', 'MISS')
+
+    def test_authorized_user_bypasses_cache(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(reverse('posts:index'))
+        self.assertEqual(response['X-Cache'], 'BYPASS')
+        self.assertIn('page_obj', response.context)
+
+    def test_new_post_resets_dependent_pages(self):
+        other = User.objects.create_user(username='other')
+        index = reverse('posts:index')
+        profile = reverse('posts:profile', kwargs={'username': 'author'})
+        other_profile = reverse('posts:profile', kwargs={'username': 'other'})
+        for url in (index, profile, other_profile):
+            self.assertCache(url, 'MISS')
+        Post.objects.create(author=other, text='Новый пост')
+        self.assertCache(index, 'MISS')
+        self.assertCache(profile, 'HIT')
+        self.assertCache(other_profile, 'MISS')
+
+    def test_comment_resets_only_post_page(self):
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        index = reverse('posts:index')
+        self.assertCache(detail, 'MISS')
+        self.assertCache(index, 'MISS')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий')
+        self.assertCache(detail, 'MISS')
+        self.assertCache(index, 'HIT')
+
+    def test_moving_post_resets_both_groups(self):
+        first = reverse('posts:group_list', kwargs={'slug': 'first'})
+        second = reverse('posts:group_list', kwargs={'slug': 'second'})
+        self.assertCache(first, 'MISS')
+        self.assertCache(second, 'MISS')
+        self.post.group = self.second_group
+        self.post.save()
+        self.assertCache(first, 'MISS')
+        self.assertCache(second, 'MISS')
+
+    def test_login_does_not_reset_pages(self):
+        self.assertCache(reverse('posts:index'), 'MISS')
+        self.author.set_password('password')
+        self.author.save()
+        self.assertCache(reverse('posts:index'), 'MISS')
+        self.guest_client.login(username='author', password='password')
+        self.guest_client.logout()
+        self.assertCache(reverse('posts:index'), 'HIT')
@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cache import POST_CACHE_KEY
+from posts.models import Comment, Follow, Group, Post
+from posts.pagination import COMMENTS_PER_PAGE
+from posts.tests.utils import max_queries
+
+User = get_user_model()
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Testik',
+        )
+        for number in range(20):
+            author = User.objects.create_user(username=f'author{number}')
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(
+                author=author,
+                text=f'Test post {number}',
+                group=cls.group,
+            )
+        cls.author = author
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_feed_query_budget(self):
+        # Сессия и пользователь — два запроса, остальное — сама лента.
+        # Группе и профилю ещё нужен id для ETag (см. posts.conditional).
+        budgets = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}): 6,
+            reverse(
+                'posts:profile',
+                kwargs={'username': self.author.username}): 6,
+            reverse('posts:follow_index'): 5,
+        }
+        for url, limit in budgets.items():
+            with self.subTest(url=url), max_queries(limit):
+                self.authorized_client.get(url)
+
+    def test_max_queries_reports_overflow(self):
+        with self.assertRaises(AssertionError):
+            with max_queries(0):
+                list(Post.objects.all())
+
+
+class PostDetailCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group)
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_cached_post_served_without_database(self):
+        self.client.get(self.url)
+        # Остаются сессия, пользователь и страница комментариев
+        with max_queries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(response.context['counter'], 1)
+
+    def test_cached_post_has_no_private_fields(self):
+        self.client.get(self.url)
+        post = cache.get(POST_CACHE_KEY.format(self.post.pk))['value']
+        self.assertLessEqual(
+            {'password', 'email'}, post.author.get_deferred_fields())
+
+    def test_cache_reset_on_changes(self):
+        self.client.get(self.url)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Новый текст', 'group': self.group.pk},
+        )
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        Post.objects.create(author=self.author, text='Ещё пост')
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['post'].text, 'Новый текст')
+        self.assertEqual(response.context['post'].comments_count, 1)
+        self.assertEqual(response.context['counter'], 2)
+        self.group.delete()
+        response = self.client.get(self.url)
+        self.assertIsNone(response.context['post'].group)
+        self.post.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class PostCommentsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.commenters = [
+            User.objects.create_user(username=f'reader{i}') for i in range(3)
+        ]
+        for i in range(COMMENTS_PER_PAGE + 5):
+            Comment.objects.create(
+                post=self.post,
+                author=self.commenters[i % 3],
+                text=f'Комментарий {i}',
+            )
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def walk(self, order):
+        texts = []
+        params = {'comments': order}
+        while True:
+            response = self.client.get(self.url, params)
+            comments = response.context['comments']
+            texts += [comment.text for comment in comments]
+            if not comments.has_next():
+                return texts
+            params['comments_cursor'] = comments.next_cursor
+
+    def test_comments_with_authors_in_one_query(self):
+        self.client.get(self.url)
+        with max_queries(3):
+            response = self.client.get(self.url)
+            for comment in response.context['comments']:
+                comment.author.username
+        self.assertEqual(len(response.context['comments']), COMMENTS_PER_PAGE)
+        self.assertContains(
+            response, f'Комментарии: {COMMENTS_PER_PAGE + 5}')
+
+    def test_cursor_walk_in_both_orders(self):
+        expected = [
+            f'Комментарий {i}' for i in range(COMMENTS_PER_PAGE + 5)
+        ]
+        self.assertEqual(self.walk('old'), expected)
+        self.assertEqual(self.walk('new'), expected[::-1])
+
+    def test_previous_page_from_cursor(self):
+        first = self.client.get(self.url).context['comments']
+        second = self.client.get(
+            self.url, {'comments_cursor': first.next_cursor},
+        ).context['comments']
+        self.assertTrue(second.has_previous())
+        back = self.client.get(
+            self.url, {'comments_cursor': second.previous_cursor},
+        ).context['comments']
+        self.assertEqual(list(back), list(first))
+
+    def test_commenter_rename_resets_guest_page(self):
+        guest = Client()
+        self.assertEqual(guest.get(self.url)['X-Cache'], 'MISS')
+        self.commenters[0].username = 'renamed'
+        self.commenters[0].save()
+        response = guest.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'renamed')
@@ -0,0 +1,79 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import match_expression, matching_ids, stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        for forms in (
+            ('кошка', 'кошки', 'кошкой'),
+            ('город', 'города', 'городами'),
+            ('читать', 'читаю', 'читала'),
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(word) for word in forms}), 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Поиск работает на SQLite FTS5')
+class SearchViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.client = Client()
+
+    def search(self, query, cursor=None):
+        params = {'q': query}
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get(reverse('posts:search'), params)
+        return response.context['page_obj']
+
+    def test_finds_other_word_forms_and_prefixes(self):
+        post = Post.objects.create(author=self.user, text='Кошки спят днём')
+        Post.objects.create(author=self.user, text='Собака лает')
+        self.assertEqual(list(self.search('кошкой')), [post])
+        self.assertEqual(list(self.search('кош')), [post])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.create(author=self.user, text='Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(list(self.search('старый')), [])
+        self.assertEqual(list(self.search('новый')), [post])
+        post.delete()
+        self.assertEqual(list(self.search('новый')), [])
+
+    def test_results_ranked_and_paginated(self):
+        best = Post.objects.create(author=self.user, text='мяч мяч мяч')
+        for number in range(12):
+            Post.objects.create(
+                author=self.user,
+                text=f'мяч и много других слов номер {number}')
+        first_page = self.search('мяч')
+        self.assertEqual(first_page[0], best)
+        self.assertTrue(first_page.has_next())
+        second_page = self.search('мяч', first_page.next_cursor)
+        self.assertEqual(len(first_page) + len(second_page), 13)
+        self.assertFalse(
+            {post.pk for post in first_page}
+            & {post.pk for post in second_page})
+
+    def test_admin_search_finds_every_match(self):
+        posts = [
+            Post.objects.create(author=self.user, text=f'Кот номер {number}')
+            for number in range(3)
+        ]
+        Post.objects.create(author=self.user, text='Собака')
+        found = Post.objects.filter(
+            pk__in=matching_ids(match_expression('коты')))
+        self.assertEqual(set(found), set(posts))
+
+    def test_empty_query(self):
+        self.assertEqual(len(self.search('')), 0)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.page_cache import stale_counts
+
+User = get_user_model()
+
+
+class StalePagesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(
+            author=self.author, text='Старый пост', group=self.group)
+        self.guest_client = Client()
+        self.url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        self.guest_client.get(self.url)
+        # Копия есть, но устарела
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group)
+
+    def test_stale_copy_served_when_database_locked(self):
+        with mock.patch(
+            'posts.views.get_object_or_404',
+            side_effect=OperationalError('database is locked'),
+        ):
+            response = self.guest_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Новый пост')
+        self.assertEqual(stale_counts(), {'deadline': 0, 'error': 1})
+
+    def test_stale_copy_served_when_validators_fail(self):
+        # ETag и Last-Modified ищут группу по slug ещё до отрисовки
+        locked = OperationalError('database is locked')
+        with mock.patch('django.db.models.query.QuerySet.first',
+                        side_effect=locked), \
+                mock.patch('posts.views.get_object_or_404',
+                           side_effect=locked):
+            response = self.guest_client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertNotIn('ETag', response)
+        self.assertContains(response, 'Старый пост')
+
+    def test_stale_copy_served_after_deadline(self):
+        with mock.patch('posts.page_cache.DB_DEADLINE_SECONDS', -1), \
+                mock.patch('posts.page_cache.PROGRESS_STEPS', 1):
+            response = self.guest_client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(stale_counts(), {'deadline': 1, 'error': 0})
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Новый пост')
+
+    def test_error_raised_without_cached_copy(self):
+        cache.clear()
+        with mock.patch(
+            'posts.views.get_object_or_404',
+            side_effect=OperationalError('database is locked'),
+        ):
+            with self.assertRaises(OperationalError):
+                self.guest_client.get(self.url)
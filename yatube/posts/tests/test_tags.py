@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from posts import tags
+from posts.cache import POST_CACHE_KEY, get_post
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TagsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_entry_outdated_by_any_tag(self):
+        tags.store('entry', 'value', ['post:1', 'author:2'])
+        self.assertEqual(tags.fetch(['entry']), {'entry': 'value'})
+        tags.invalidate('author:3')
+        self.assertEqual(tags.fetch(['entry']), {'entry': 'value'})
+        tags.invalidate('author:2')
+        self.assertEqual(tags.fetch(['entry']), {})
+
+    def test_evicted_tag_version_outdates_entries(self):
+        tags.invalidate('post:1')
+        tags.store('entry', 'value', ['post:1'])
+        cache.delete(tags.TAG_KEY.format('post:1'))
+        self.assertEqual(tags.fetch(['entry']), {})
+        tags.store('entry', 'value', ['post:1'])
+        tags.invalidate('post:1')
+        self.assertEqual(tags.fetch(['entry']), {})
+
+    def test_get_or_set_ignores_change_during_build(self):
+        def build():
+            tags.invalidate('post:1')
+            return 'old'
+
+        self.assertEqual(tags.get_or_set('entry', ['post:1'], build), 'old')
+        self.assertEqual(
+            tags.get_or_set('entry', ['post:1'], lambda: 'new'), 'new')
+        self.assertEqual(
+            tags.get_or_set('entry', ['post:1'], lambda: 'newer'), 'new')
+
+    def test_collect_inherits_tags_of_read_entries(self):
+        tags.store('card', 'html', ['post:1'])
+        with tags.collect() as page_tags:
+            tags.fetch(['card'])
+            tags.add('feed')
+        tags.store('page', 'html', page_tags)
+        tags.invalidate('post:1')
+        self.assertEqual(tags.fetch(['page']), {})
+
+
+class InvalidateOnCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+
+    def test_entry_built_before_commit_is_outdated(self):
+        with transaction.atomic():
+            Post.objects.create(author=self.author, text='Пост')
+            # Так страницу построил бы другой процесс: без нового поста
+            tags.store('page', 'без поста', ['feed'])
+            self.assertEqual(tags.fetch(['page']), {'page': 'без поста'})
+        self.assertEqual(tags.fetch(['page']), {})
+
+
+class PostCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def test_author_change_during_build_not_cached(self):
+        select_related = Post.objects.select_related
+
+        def load(*fields):
+            # Автор сменил имя, пока пост читали из базы
+            tags.invalidate(f'author:{self.author.pk}')
+            return select_related(*fields)
+
+        with mock.patch.object(
+                Post.objects, 'select_related', side_effect=load):
+            self.assertEqual(get_post(self.post.pk), self.post)
+        key = POST_CACHE_KEY.format(self.post.pk)
+        self.assertEqual(tags.fetch([key]), {})
+        get_post(self.post.pk)
+        self.assertIn(key, tags.fetch([key]))
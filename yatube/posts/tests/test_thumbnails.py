@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import tags, thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), color=(200, 30, 30)).save(
+            buffer, 'JPEG')
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('photo.jpg', buffer.getvalue(),
+                                     content_type='image/jpeg'),
+        )
+        self.client = Client()
+        cache.clear()
+
+    def test_placeholder_until_thumbnail_ready(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'bg-light')
+        self.assertIsNone(thumbnails.ready_thumbnail(self.post.image.name))
+
+        thumbnails.register(*thumbnails.generate(self.post.image.name))
+        # У поста нет группы — и тега её ленты тоже
+        self.assertEqual(
+            tags.versions(['group-posts:None']), {'group-posts:None': None})
+
+        thumbnail = thumbnails.ready_thumbnail(self.post.image.name)
+        self.assertEqual(list(thumbnail.size), [960, 339])
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail.url)
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow_page(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        post = Post.objects.create(author=self.author, text='Старый пост')
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertEqual(self.follow_page(), [post])
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page(), [])
+
+    @mock.patch('posts.timeline.CELEBRITY_FOLLOWERS', 1)
+    def test_celebrity_posts_merged_on_read(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Для миллионов')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.follow_page(), [post])
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    @mock.patch('posts.timeline.CELEBRITY_FOLLOWERS', 1)
+    def test_each_celebrity_synced_separately(self):
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        older = Post.objects.create(author=self.author, text='Пост A')
+        newer = Post.objects.create(author=other, text='Пост B')
+        # Подписка подтягивает пост B, более свежий, чем пост A
+        Follow.objects.create(user=self.reader, author=other)
+        self.assertEqual(self.follow_page(), [newer, older])
+
+    @mock.patch('posts.timeline.BACKFILL_POSTS', 2)
+    def test_backfill_many_takes_latest_posts(self):
+        other = User.objects.create_user(username='other')
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Post.objects.create(author=other, text='Чужой пост')
+        Follow.objects.bulk_create([
+            Follow(user=self.reader, author=self.author),
+            Follow(user=other, author=self.author),
+        ])
+        timeline.backfill_many(Follow.objects.filter(author=self.author))
+        for user in (self.reader, other):
+            self.assertEqual(
+                set(TimelineEntry.objects.filter(
+                    user=user).values_list('post_id', flat=True)),
+                {posts[1].pk, posts[2].pk},
+            )
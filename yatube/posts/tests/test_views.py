@@ -10,6 +10,10 @@ from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
 
+from posts.cache import INDEX_LOCK_KEY
+from posts.counters import recount
+from posts.pagination import ELLIPSIS, elided_page_range
+
 User = get_user_model()
 
 
@@ -203,13 +207,48 @@ class PostModelTest(TestCase):
         response = self.authorized_client.get(reverse('posts:index'))
         response_post = response.context['page_obj'][0]
         self.assertEqual(post, response_post)
-        post.delete()
+        # Изменение в обход сигналов не видно, пока копия в кэше
+        Post.objects.filter(pk=post.pk).update(text='changed')
         response_2 = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response_2.content)
         cache.clear()
         response_3 = self.authorized_client.get(reverse('posts:index'))
         self.assertNotEqual(response.content, response_3.content)
 
+    def test_cache_invalidated_on_delete(self):
+        """Удаление поста сбрасывает кэш главной."""
+        post = Post.objects.create(
+            text='text',
+            author=self.user,
+            group=self.group
+        )
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertIn(post, response.context['page_obj'])
+        post.delete()
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+
+    def test_cache_serves_stale_copy_while_locked(self):
+        """Пока другой процесс пересчитывает ленту, отдаётся старая копия."""
+        self.authorized_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        cache.add(INDEX_LOCK_KEY, True)
+        post = Post.objects.create(
+            text='Пост во время пересчёта',
+            author=self.user,
+            group=self.group
+        )
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, post.text)
+        cache.delete(INDEX_LOCK_KEY)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertIn(post, response.context['page_obj'])
+        # Страница гостя из старой копии не считается свежей
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, post.text)
+
 
 class PaginatorViewsTest(TestCase):
     # Здесь создаются фикстуры: клиент и 13 тестовых записей.
@@ -232,6 +271,8 @@ class PaginatorViewsTest(TestCase):
             )
             )
         Post.objects.bulk_create(cls.posts)
+        # bulk_create не вызывает сигналы, счётчики пересчитываем сами
+        recount()
 
     def setUp(self):
         # Создаем неавторизованный клиент
@@ -281,6 +322,47 @@ class PaginatorViewsTest(TestCase):
             kwargs={'username': f'{self.user.username}'}) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages_walk_whole_feed(self):
+        """Keyset-страницы проходят ленту без пропусков и повторов."""
+        url = reverse('posts:index')
+        response = self.client.get(url + '?cursor=')
+        first_page = response.context['page_obj']
+        self.assertEqual(len(first_page), 10)
+        self.assertFalse(first_page.has_previous())
+        response = self.client.get(
+            url + '?cursor=' + first_page.next_cursor)
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        seen = [post.pk for post in first_page] + [
+            post.pk for post in second_page]
+        self.assertEqual(
+            seen,
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True)))
+        response = self.client.get(
+            url + '?cursor=' + second_page.previous_cursor)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [post.pk for post in first_page])
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:index') + '?cursor=xyz')
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_page_range_elided(self):
+        """Навигация показывает края и соседей текущей страницы."""
+        self.assertEqual(
+            list(elided_page_range(500, 250)),
+            [1, ELLIPSIS, 248, 249, 250, 251, 252, ELLIPSIS, 500])
+        self.assertEqual(
+            list(elided_page_range(12, 1)), [1, 2, 3, ELLIPSIS, 12])
+        self.assertEqual(list(elided_page_range(7, 4)), list(range(1, 8)))
+        response = self.authorized_client.get(
+            reverse('posts:index') + '?page=2')
+        self.assertContains(response, '?page=1"')
+        self.assertNotContains(response, ELLIPSIS)
+
 
 class FollowTests(TestCase):
     def setUp(self):
@@ -0,0 +1,40 @@
+from contextlib import ContextDecorator
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class max_queries(ContextDecorator):
+    """Проверяет, что блок кода делает не больше ``limit`` SQL-запросов.
+
+    Работает и как контекстный менеджер, и как декоратор теста::
+
+        @max_queries(5)
+        def test_index(self):
+            self.client.get('/')
+    """
+
+    def __init__(self, limit, using=connection):
+        self.limit = limit
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(self.using)
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.limit:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(
+                    self.context.captured_queries, start=1)
+            )
+            raise AssertionError(
+                f'{executed} запросов при лимите {self.limit}:\n{queries}'
+            )
+        return False
@@ -0,0 +1,165 @@
+"""Миниатюры картинок постов, заготовленные заранее.
+
+Ленты показывают картинку в размере ``GEOMETRY``. Раньше миниатюру
+строил тег ``{% thumbnail %}`` прямо во время запроса, и первый
+зритель страницы ждал, пока откроются и пережмутся все картинки.
+
+Теперь миниатюра строится при загрузке поста в пуле процессов (работа
+с Pillow упирается в процессор, потоки здесь не помогут). Процесс-
+работник только пишет файл миниатюры и не трогает базу; запись в
+хранилище ключей sorl-thumbnail делает основной процесс. Пока миниатюры
+нет, шаблоны показывают заглушку.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from . import tags
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+WORKERS = 2
+
+_executor = None
+# Картинки, миниатюры которых уже строятся, чтобы не ставить их дважды.
+_pending = set()
+
+
+def _thumbnail_options(source):
+    """Полные опции миниатюры — так же, как их дополняет sorl-thumbnail,
+    иначе имя файла миниатюры не совпадёт с именем из шаблонного тега."""
+    backend = default.backend
+    options = dict(OPTIONS)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(name):
+    """Миниатюра для картинки ``name`` (файл может ещё не существовать)."""
+    source = ImageFile(name)
+    options = _thumbnail_options(source)
+    thumbnail_name = default.backend._get_thumbnail_filename(
+        source, GEOMETRY, options)
+    return source, ImageFile(thumbnail_name, default.storage), options
+
+
+def ready_thumbnail(name):
+    """Готовая миниатюра из хранилища ключей или None."""
+    _, thumbnail, _ = thumbnail_file(name)
+    return default.kvstore.get(thumbnail)
+
+
+def prefetch(posts):
+    """Загружает записи о миниатюрах всех постов страницы разом,
+    если хранилище ключей это умеет (см. posts.kvstore)."""
+    prefetch_keys = getattr(default.kvstore, 'prefetch', None)
+    if prefetch_keys is None:
+        return
+    prefetch_keys([
+        add_prefix(thumbnail_file(post.image.name)[1].key)
+        for post in posts
+        if post.image
+    ])
+
+
+def generate(name):
+    """Строит файл миниатюры. Выполняется в процессе-работнике.
+
+    Возвращает имя картинки и размеры картинки и миниатюры — их основной
+    процесс запишет в хранилище ключей.
+    """
+    source, thumbnail, options = thumbnail_file(name)
+    source_image = default.engine.get_image(source)
+    try:
+        options['image_info'] = default.engine.get_image_info(source_image)
+        source_size = default.engine.get_image_size(source_image)
+        if not thumbnail.exists():
+            default.backend._create_thumbnail(
+                source_image, GEOMETRY, options, thumbnail)
+        else:
+            thumbnail.set_size()
+    finally:
+        default.engine.cleanup(source_image)
+    return name, source_size, thumbnail.size
+
+
+def register(name, source_size, thumbnail_size):
+    """Записывает готовую миниатюру в хранилище ключей sorl-thumbnail."""
+    source, thumbnail, _ = thumbnail_file(name)
+    source.set_size(source_size)
+    thumbnail.set_size(thumbnail_size)
+    default.kvstore.get_or_set(source)
+    default.kvstore.set(thumbnail, source)
+    # В закэшированных карточках и страницах вместо миниатюры ещё стоит
+    # заглушка
+    posts = Post.objects.filter(image=name).values_list(
+        'pk', 'author_id', 'group_id')
+    for post_id, author_id, group_id in posts:
+        post_tags = ['feed', f'post:{post_id}', f'author-posts:{author_id}']
+        if group_id is not None:
+            post_tags.append(f'group-posts:{group_id}')
+        tags.invalidate(*post_tags)
+
+
+def _init_worker():
+    django.setup()
+
+
+def make_executor(max_workers):
+    """Пул процессов, в которых настроен Django (нужно при запуске
+    процессов через spawn и forkserver)."""
+    return ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = make_executor(WORKERS)
+    return _executor
+
+
+def _on_done(name, future):
+    # Колбэк идёт в служебном потоке пула, а не в потоке запроса:
+    # соединение с базой он открывает и закрывает сам
+    _pending.discard(name)
+    close_old_connections()
+    try:
+        register(*future.result())
+    except Exception:
+        logger.exception('Не удалось построить миниатюру для %s', name)
+    finally:
+        close_old_connections()
+
+
+def schedule(name):
+    """Отдаёт построение миниатюры пулу процессов, не дожидаясь его."""
+    name = str(name)
+    if not name or not WORKERS or name in _pending:
+        return
+    _pending.add(name)
+    future = get_executor().submit(generate, name)
+    future.add_done_callback(lambda done: _on_done(name, done))
+
+
+def schedule_on_commit(name):
+    """То же, но после фиксации транзакции, в которой сохранён пост."""
+    if name:
+        transaction.on_commit(lambda: schedule(name))
@@ -0,0 +1,167 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Когда автор публикует пост, строка ``TimelineEntry`` появляется у каждого
+его подписчика, и страница ``/follow/`` читает готовую ленту одним
+диапазоном по индексу ``(user, -pub_date)``.
+
+У «знаменитостей» с огромным числом подписчиков раздача при публикации
+не делается: их посты подтягиваются в ленту читателя при открытии
+страницы подписок (hybrid fan-out on read), только новые с прошлого раза.
+"""
+from django.db import connection
+from django.db.models import Max, Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+# С какого числа подписчиков посты автора не раздаются при публикации.
+CELEBRITY_FOLLOWERS = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+BACKFILL_POSTS = 1000
+# Не больше 500: столько частей SQLite допускает в составном SELECT,
+# из которого собирается INSERT в bulk_create.
+BATCH_SIZE = 500
+
+
+def _entries(user_id, posts):
+    return (
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      author_id=post.author_id, pub_date=post.pub_date)
+        for post in posts
+    )
+
+
+def is_celebrity(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id, followers_count__gte=CELEBRITY_FOLLOWERS
+    ).exists()
+
+
+def fan_out(post):
+    """Раздаёт новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post.pk,
+                          author_id=post.author_id, pub_date=post.pub_date)
+            for user_id in follower_ids.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_many(posts):
+    """Раздаёт в ленты подписчиков сразу много постов.
+
+    Нужна после массовой вставки, когда сигналы не срабатывают. Строки
+    лент создаёт в базе один INSERT ... SELECT: постов и подписчиков
+    бывают миллионы, гонять их через Python слишком долго.
+    """
+    post_ids, params = posts.exclude(
+        author__stats__followers_count__gte=CELEBRITY_FOLLOWERS
+    ).values('pk').query.sql_with_params()
+    ops = connection.ops
+    entry = TimelineEntry._meta.db_table
+    post = Post._meta.db_table
+    follow = Follow._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} {entry} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT {follow}.user_id, {post}.id, {post}.author_id, '
+            f'{post}.pub_date FROM {post} '
+            f'INNER JOIN {follow} ON {follow}.author_id = {post}.author_id '
+            f'WHERE {post}.id IN ({post_ids}) '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            params,
+        )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date'
+    )[:BACKFILL_POSTS]
+    TimelineEntry.objects.bulk_create(
+        _entries(user_id, posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_many(follows):
+    """Делает то же, что ``backfill``, сразу для всех подписок из
+    queryset ``follows`` — одним INSERT ... SELECT, как ``fan_out_many``.
+    """
+    follow_ids, params = follows.values('pk').query.sql_with_params()
+    ops = connection.ops
+    entry = ops.quote_name(TimelineEntry._meta.db_table)
+    post = ops.quote_name(Post._meta.db_table)
+    follow = ops.quote_name(Follow._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} {entry} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT {follow}.user_id, latest.id, latest.author_id, '
+            f'latest.pub_date FROM {follow} INNER JOIN ('
+            f'SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {post} WHERE author_id IN ('
+            f'SELECT author_id FROM {follow} WHERE id IN ({follow_ids}))'
+            f') latest ON latest.author_id = {follow}.author_id '
+            f'WHERE {follow}.id IN ({follow_ids}) '
+            f'AND latest.position <= %s '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            [*params, *params, BACKFILL_POSTS],
+        )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def followed_celebrities(user_id):
+    followed = Follow.objects.filter(user_id=user_id).values('author_id')
+    return list(UserStats.objects.filter(
+        user_id__in=followed, followers_count__gte=CELEBRITY_FOLLOWERS
+    ).values_list('user_id', flat=True))
+
+
+def sync_celebrities(user_id):
+    """Подтягивает в ленту новые посты знаменитостей, на которых
+    подписан пользователь."""
+    celebrities = followed_celebrities(user_id)
+    if not celebrities:
+        return
+    # Отметка у каждой знаменитости своя: общая ушла бы вперёд с новым
+    # постом одной из них и скрыла бы ещё не подтянутые посты остальных
+    synced_until = dict(TimelineEntry.objects.filter(
+        user_id=user_id, author_id__in=celebrities
+    ).order_by().values('author_id').annotate(
+        last=Max('pub_date')
+    ).values_list('author_id', 'last'))
+    unsynced = Q()
+    for author_id in celebrities:
+        if author_id in synced_until:
+            unsynced |= Q(author_id=author_id,
+                          pub_date__gt=synced_until[author_id])
+        else:
+            unsynced |= Q(author_id=author_id)
+    posts = Post.objects.filter(unsynced).only('pk', 'author_id', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        _entries(user_id, posts[:BACKFILL_POSTS]),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def timeline_posts(user_id):
+    """Посты ленты подписок в порядке материализованной ленты."""
+    return Post.objects.select_related('author', 'group').filter(
+        timeline_entries__user_id=user_id
+    ).order_by('-timeline_entries__pub_date')
@@ -1,7 +1,7 @@
 # posts/urls.py
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 
@@ -15,6 +15,8 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search_posts, name='search'),
+    path('export/', views.export_account, name='export'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -25,5 +27,30 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
-    path('posts/<int:post_id>/comment/', views.add_comment, name='add_comment')
+    path(
+        'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
+    ),
+    # RSS и Atom
+    path('rss/', feeds.index_rss, name='index_rss'),
+    path('atom/', feeds.index_atom, name='index_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path(
+        'profile/<str:username>/rss/', feeds.author_rss, name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom,
+        name='profile_atom'
+    ),
+    # JSON API для мобильного клиента
+    path('api/v1/posts/', api.index, name='api_index'),
+    path('api/v1/group/<slug:slug>/', api.group_posts, name='api_group'),
+    path(
+        'api/v1/profile/<str:username>/', api.profile, name='api_profile'
+    ),
+    path('api/v1/follow/', api.follow_index, name='api_follow'),
+    path(
+        'api/v1/posts/<int:post_id>/', api.post_detail, name='api_post'
+    ),
 ]
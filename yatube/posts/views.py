@@ -1,31 +1,37 @@
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, render, redirect
 from .models import Group, Post, User, Follow
 from posts.models import Post
 from .forms import PostForm, CommentForm
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.views.decorators.http import require_GET
-from django.core.cache import cache
 from django.urls import reverse
 
-
-def paginator(request, post_list):
-    paginator_obj = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    return paginator_obj.get_page(page_number)
+from . import cards, export, search, tags, thumbnails, timeline
+from .cache import feed_queryset, get_index_feed, get_post
+from .conditional import (
+    conditional_page, group_tags, index_tags, post_tags, profile_tags,
+)
+from .counters import cached_stats, get_stats
+from .page_cache import cache_anonymous_page
+from .pagination import COMMENTS_PER_PAGE, CursorPaginator, paginate
 
 
 @require_GET
+@conditional_page(index_tags)
+@cache_anonymous_page
 def index(request):
     ''' Главная страница'''
-    # Одна строка вместо тысячи слов на SQL:
-    # в переменную posts будет сохранена выборка из 10 объектов модели Post,
-    # отсортированных по полю pub_date по убыванию
-    posts = cache.get('posts:index')
-    if posts is None:
-        posts = Post.objects.all()
-        cache.set('posts:index', posts, timeout=20)
-    page_obj = paginator(request, posts)
+    # Первые страницы главной берём из кэша, keyset-страницы
+    # и так дёшевы и читаются из базы напрямую
+    if 'cursor' in request.GET:
+        tags.add('feed')
+        posts = feed_queryset()
+    else:
+        posts = get_index_feed()
+    page_obj = paginate(request, posts)
+    thumbnails.prefetch(cards.prefetch(page_obj))
     # В словаре context отправляем информацию в шаблон
     context = {
         'posts': posts,
@@ -34,13 +40,17 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_tags)
+@cache_anonymous_page
 def group_posts(request, slug):
     ''' Страница cо списком страниц сообщества'''
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    tags.add(f'group:{group.pk}', f'group-posts:{group.pk}')
+    posts = group.posts.select_related('author', 'group')
     template = 'posts/group_list.html'
     title = 'Здесь будет информация о группах проекта Yatube'
-    page_obj = paginator(request, posts)
+    page_obj = paginate(request, posts)
+    thumbnails.prefetch(cards.prefetch(page_obj))
     # В словаре context отправляем информацию в шаблон
     context = {
         'title': title,
@@ -51,11 +61,20 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional_page(profile_tags)
+@cache_anonymous_page
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    counter = posts.count()
-    page_obj = paginator(request, posts)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    tags.add(
+        f'author:{author.pk}', f'author-posts:{author.pk}',
+        f'stats:{author.pk}',
+    )
+    posts = author.posts.select_related('author', 'group')
+    counter = get_stats(author).posts_count
+    page_obj = paginate(request, posts, count=counter)
+    thumbnails.prefetch(cards.prefetch(page_obj))
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user, author=author
@@ -73,22 +92,56 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page(post_tags)
+@cache_anonymous_page
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    # Пост и счётчики автора читаются из кэша, базу ссылка на
+    # популярный пост обычно не трогает
+    post = get_post(post_id)
+    if post is None:
+        raise Http404
     author = post.author
-    all_posts = author.posts.all()
-    counter = all_posts.count()
+    counter = cached_stats(author.pk).posts_count
     form = CommentForm()
+    # Комментарии — keyset-страницей одним запросом вместе с авторами,
+    # по умолчанию от старых к новым; общее число — из счётчика поста
+    comments_order = 'new' if request.GET.get('comments') == 'new' else 'old'
+    comments = CursorPaginator(
+        post.comments.select_related('author').only(
+            'id', 'post', 'text', 'created', 'author',
+            'author__username'),
+        COMMENTS_PER_PAGE,
+        date_field='created',
+        ascending=comments_order == 'old',
+    ).get_page(request.GET.get('comments_cursor'))
+    # Страница показывает имена комментаторов
+    tags.add(*{f'author:{comment.author_id}' for comment in comments})
     context = {
         'post': post,
         'counter': counter,
         'author': author,
         'form': form,
+        'comments': comments,
+        'comments_order': comments_order,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@require_GET
+def search_posts(request):
+    ''' Поиск по текстам постов'''
+    query = request.GET.get('q', '').strip()
+    page_obj = search.search_page(query, request.GET.get('cursor'))
+    thumbnails.prefetch(cards.prefetch(page_obj))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
@@ -96,7 +149,7 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
-
+    thumbnails.schedule_on_commit(post.image.name)
     return redirect('posts:profile', username=post.author)
 
 
@@ -104,9 +157,13 @@ def post_create(request):
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     author = post.author
-    form = PostForm(request.POST, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if request.method == 'POST' and form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule_on_commit(post.image.name)
         return redirect('posts:post_detail', post_id=post.pk)
     return render(request, 'posts/post_create.html',
                   {'form': form, 'post': post, 'author': author,
@@ -124,6 +181,7 @@ def page_not_found(request, exception):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -150,15 +208,16 @@ def server_error(request):
 
 @login_required
 def follow_index(request):
-    list_of_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(list_of_posts, 20)
-    page_namber = request.GET.get('page_obj')
-    page = paginator.get_page(page_namber)
-    context = {'page_obj': page}
+    timeline.sync_celebrities(request.user.pk)
+    list_of_posts = timeline.timeline_posts(request.user.pk)
+    page_obj = paginate(request, list_of_posts, 20)
+    thumbnails.prefetch(cards.prefetch(page_obj))
+    context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -170,8 +229,20 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     is_follower = Follow.objects.filter(user=request.user, author=author)
     is_follower.delete()
     return redirect('posts:profile', username=author)
+
+
+@login_required
+@require_GET
+def export_account(request):
+    """ZIP со всеми постами, комментариями и картинками пользователя."""
+    response = StreamingHttpResponse(
+        export.stream(request.user), content_type='application/zip')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export.filename(request.user)}"')
+    return response
@@ -10,7 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -150,8 +154,25 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Кэш в файле SQLite — общий для всех процессов сервера
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 64 * 2 ** 20,
+        },
     }
 }
+
+# Тесты чистят кэш: у каждого прогона свой файл, чтобы не задеть кэш
+# запущенного сервера и параллельные прогоны
+if sys.argv[1:2] == ['test'] or 'pytest' in sys.modules:
+    TEST_CACHE_DIR = tempfile.mkdtemp(prefix='yatube-cache-')
+    atexit.register(shutil.rmtree, TEST_CACHE_DIR, ignore_errors=True)
+    CACHES['default']['LOCATION'] = os.path.join(
+        TEST_CACHE_DIR, 'cache.sqlite3')
+
+# Хранилище ключей sorl-thumbnail с LRU-кэшем в памяти процесса
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'